@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Quiz.settings')
 
 application = get_asgi_application()
+
+if os.environ.get('QUIZ_WARM_UP') == '1':
+    from quiz_app.warmup import warm_up
+
+    warm_up()
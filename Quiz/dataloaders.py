@@ -0,0 +1,140 @@
+from collections import defaultdict
+
+from quiz_app.models import (
+    Quiz,
+    Question,
+    Choice,
+    QuizAttempt,
+    AttemptedAnswers
+)
+
+
+class BatchLoader:
+    """
+    Synchronous DataLoader. Keys primed while the parent level is resolved
+    are fetched together, with a single ``IN`` query, the first time any
+    one of them is loaded.
+    """
+
+    def __init__(self, batch_load, many=False):
+        self.batch_load = batch_load
+        self.many = many
+        self.cache = {}
+        self.pending = set()
+
+    def prime(self, keys):
+        self.pending.update(key for key in keys if key not in self.cache)
+
+    def prime_value(self, key, value):
+        self.cache.setdefault(key, value)
+        self.pending.discard(key)
+
+    def load(self, key):
+        if key not in self.cache:
+            keys = self.pending | {key}
+            self.pending = set()
+            results = self.batch_load(keys)
+
+            for batch_key in keys:
+                self.cache[batch_key] = results.get(
+                    batch_key, [] if self.many else None
+                )
+
+        return self.cache[key]
+
+
+BY_ID = {
+    Quiz: 'quiz',
+    Question: 'question',
+    Choice: 'choice',
+    QuizAttempt: 'attempt',
+}
+
+RELATIONS = {
+    Quiz: [
+        ('questions_by_quiz', 'pk'),
+        ('attempts_by_quiz', 'pk'),
+    ],
+    Question: [
+        ('quiz', 'quiz_id'),
+        ('choices_by_question', 'pk'),
+        ('answers_by_question', 'pk'),
+    ],
+    Choice: [
+        ('question', 'question_id'),
+        ('answers_by_choice', 'pk'),
+    ],
+    QuizAttempt: [
+        ('quiz', 'quiz_id'),
+        ('answers_by_attempt', 'pk'),
+    ],
+    AttemptedAnswers: [
+        ('attempt', 'attempt_id'),
+        ('question', 'question_id'),
+        ('choice', 'selected_choice_id'),
+    ],
+}
+
+
+class Loaders:
+    def __init__(self):
+        self.quiz = BatchLoader(self.by_id(Quiz))
+        self.question = BatchLoader(self.by_id(Question))
+        self.choice = BatchLoader(self.by_id(Choice))
+        self.attempt = BatchLoader(self.by_id(QuizAttempt))
+
+        self.questions_by_quiz = BatchLoader(self.by_fk(Question, 'quiz_id'), many=True)
+        self.attempts_by_quiz = BatchLoader(self.by_fk(QuizAttempt, 'quiz_id'), many=True)
+        self.choices_by_question = BatchLoader(self.by_fk(Choice, 'question_id'), many=True)
+        self.answers_by_question = BatchLoader(
+            self.by_fk(AttemptedAnswers, 'question_id'), many=True
+        )
+        self.answers_by_choice = BatchLoader(
+            self.by_fk(AttemptedAnswers, 'selected_choice_id'), many=True
+        )
+        self.answers_by_attempt = BatchLoader(
+            self.by_fk(AttemptedAnswers, 'attempt_id'), many=True
+        )
+
+    def by_id(self, model):
+        def batch_load(keys):
+            objects = model.objects.in_bulk(keys)
+            self.seen(objects.values())
+            return objects
+
+        return batch_load
+
+    def by_fk(self, model, field):
+        def batch_load(keys):
+            objects = list(model.objects.filter(**{f'{field}__in': keys}))
+            grouped = defaultdict(list)
+
+            for obj in objects:
+                grouped[getattr(obj, field)].append(obj)
+
+            self.seen(objects)
+            return grouped
+
+        return batch_load
+
+    def seen(self, objects):
+        """Prime every loader the next level of the query may ask for."""
+        for obj in objects:
+            model = type(obj)
+
+            if model in BY_ID:
+                getattr(self, BY_ID[model]).prime_value(obj.pk, obj)
+
+            for loader, attribute in RELATIONS[model]:
+                getattr(self, loader).prime([getattr(obj, attribute)])
+
+
+def get_loaders(info):
+    context = info.context
+    loaders = getattr(context, 'dataloaders', None)
+
+    if loaders is None:
+        loaders = Loaders()
+        setattr(context, 'dataloaders', loaders)
+
+    return loaders
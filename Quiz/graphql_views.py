@@ -0,0 +1,278 @@
+import hashlib
+import json
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import (
+    ExecutionResult,
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationType,
+    ValidationRule,
+    execute,
+    get_named_type,
+    get_nullable_type,
+    get_operation_ast,
+    is_list_type,
+    parse,
+    validate,
+)
+from graphql.validation import specified_rules
+
+from quiz_app.caching import LRUCache
+
+
+CachedDocument = namedtuple('CachedDocument', ['query', 'document', 'errors'])
+
+document_cache = LRUCache(
+    getattr(settings, 'QUIZ_GRAPHQL_DOCUMENT_CACHE_SIZE', 500)
+)
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class QueryCostRule(ValidationRule):
+    """
+    Reject operations whose depth, number of selected fields or estimated
+    row fan-out exceed the QUIZ_GRAPHQL_* limits, before anything runs.
+
+    Connection fields fan out by their ``first``/``last`` argument (or the
+    relay max limit when it is missing or a variable); nested list fields
+    fan out by the per-relation estimate in QUIZ_GRAPHQL_LIST_FANOUT.
+    Introspection fields are not counted.
+    """
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.max_depth = settings.QUIZ_GRAPHQL_MAX_DEPTH
+        self.max_fields = settings.QUIZ_GRAPHQL_MAX_FIELDS
+        self.max_rows = settings.QUIZ_GRAPHQL_MAX_ROWS
+        self.fanout = settings.QUIZ_GRAPHQL_LIST_FANOUT
+
+    def enter_operation_definition(self, node, *args):
+        root_type = self.context.schema.get_root_type(node.operation)
+
+        if root_type is None:
+            return
+
+        depth, fields, rows = self.measure(node.selection_set, root_type, 1, 1, set())
+
+        if depth > self.max_depth:
+            self.report_error(GraphQLError(
+                f"Query depth {depth} exceeds the limit of {self.max_depth}.", node
+            ))
+        if fields > self.max_fields:
+            self.report_error(GraphQLError(
+                f"Query selects {fields} fields, the limit is {self.max_fields}.", node
+            ))
+        if rows > self.max_rows:
+            self.report_error(GraphQLError(
+                f"Query may load about {rows} rows, the limit is {self.max_rows}.", node
+            ))
+
+    def measure(self, selection_set, parent_type, depth, multiplier, fragments):
+        max_depth, fields, rows = depth, 0, 0
+
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                name = selection.name.value
+                field = getattr(parent_type, 'fields', {}).get(name)
+
+                if name.startswith('__') or field is None:
+                    continue
+
+                fields += 1
+                fanout = self.field_fanout(parent_type, name, field, selection)
+                if fanout is not None:
+                    multiplier_here = multiplier * fanout
+                    rows += multiplier_here
+                else:
+                    multiplier_here = multiplier
+
+                if selection.selection_set:
+                    child = self.measure(selection.selection_set, get_named_type(field.type),
+                                         depth + 1, multiplier_here, fragments)
+                    max_depth = max(max_depth, child[0])
+                    fields += child[1]
+                    rows += child[2]
+                continue
+
+            if isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.context.get_fragment(name)
+                if fragment is None or name in fragments:
+                    continue
+                # Only the fragments being expanded above this one are
+                # cycles; siblings and later reuses are measured again.
+                ancestors = fragments | {name}
+            elif isinstance(selection, InlineFragmentNode):
+                fragment = selection
+                ancestors = fragments
+            else:
+                continue
+
+            fragment_type = parent_type
+            if fragment.type_condition is not None:
+                fragment_type = self.context.schema.get_type(
+                    fragment.type_condition.name.value
+                ) or parent_type
+
+            child = self.measure(fragment.selection_set, fragment_type,
+                                 depth, multiplier, ancestors)
+            max_depth = max(max_depth, child[0])
+            fields += child[1]
+            rows += child[2]
+
+        return max_depth, fields, rows
+
+    def field_fanout(self, parent_type, name, field, node):
+        if 'first' in field.args or 'last' in field.args:
+            fanout = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+            for argument in node.arguments:
+                if (argument.name.value in ('first', 'last')
+                        and isinstance(argument.value, IntValueNode)):
+                    fanout = int(argument.value.value)
+            return fanout
+
+        if is_list_type(get_nullable_type(field.type)) and name != 'edges':
+            return self.fanout.get(f"{parent_type.name}.{name}", self.fanout['default'])
+
+        return None
+
+
+class CachedGraphQLView(GraphQLView):
+    """
+    GraphQLView that keeps parsed and validated documents in an LRU cache
+    keyed by the query's SHA-256 and accepts automatic persisted queries
+    (``extensions.persistedQuery.sha256Hash``) in place of the query text.
+    """
+
+    validation_rules = (*specified_rules, QueryCostRule)
+
+    def get_graphql_params(self, request, data):
+        query, variables, operation_name, id = super().get_graphql_params(request, data)
+        persisted_hash = self.get_persisted_hash(request, data)
+
+        if persisted_hash is None:
+            return query, variables, operation_name, id
+
+        if query:
+            if query_hash(query) != persisted_hash:
+                raise HttpError(HttpResponseBadRequest(
+                    "Persisted query hash does not match the query."
+                ))
+        else:
+            cached = document_cache.get(persisted_hash)
+            if cached is None:
+                raise HttpError(HttpResponse(), "PersistedQueryNotFound")
+            query = cached.query
+
+        return query, variables, operation_name, id
+
+    @staticmethod
+    def get_persisted_hash(request, data):
+        extensions = request.GET.get("extensions") or data.get("extensions")
+
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+
+        if not isinstance(extensions, dict):
+            return None
+
+        persisted_query = extensions.get("persistedQuery") or {}
+        return persisted_query.get("sha256Hash")
+
+    def get_document(self, query):
+        key = query_hash(query)
+        cached = document_cache.get(key)
+
+        if cached is None:
+            try:
+                document = parse(query)
+            except Exception as e:
+                return CachedDocument(query, None, [e])
+
+            errors = validate(
+                self.schema.graphql_schema,
+                document,
+                self.validation_rules,
+                graphene_settings.MAX_VALIDATION_ERRORS,
+            )
+            cached = CachedDocument(query, document, errors)
+            document_cache.set(key, cached)
+
+        return cached
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        if not query:
+            return super().execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+
+        _, document, errors = self.get_document(query)
+
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = self.execution_context_class
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(self.schema.graphql_schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(self.schema.graphql_schema, document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
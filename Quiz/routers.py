@@ -0,0 +1,134 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+PRIMARY_PIN_COOKIE = 'primary_pin'
+PRIMARY_PIN_SALT = 'Quiz.routers.primary_pin'
+
+
+def primary_pin_key(user_id):
+    return f"primary-pin:{user_id}"
+
+
+class ReplicaRouter:
+    """
+    Send reads to the QUIZ_READ_REPLICA alias while ReplicaRoutingMiddleware
+    marks the current request as replica-safe; everything else (writes,
+    reads inside transactions, management commands) uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = getattr(settings, 'QUIZ_READ_REPLICA', None)
+
+        if (
+            replica
+            and read_from_replica.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return replica
+
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let safe requests read from the replica, except for users who made a
+    successful write in the last QUIZ_PRIMARY_PIN_SECONDS: they are pinned
+    to the primary so they always read their own writes.
+
+    The pin is kept in the Django cache, which ``serve`` requires to be
+    shared by its workers, and also set as a signed cookie holding the user
+    id for clients that send cookies back.
+    """
+
+    authentication = JWTAuthentication()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUIZ_READ_REPLICA', None):
+            return self.get_response(request)
+
+        user_id = self.get_user_id(request)
+        use_replica = request.method in SAFE_METHODS and not (
+            user_id is not None and self.is_pinned(request, user_id)
+        )
+
+        token = read_from_replica.set(use_replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user_id = user_id or self.get_user_id(request)
+            if user_id is not None:
+                cache.set(primary_pin_key(user_id), True,
+                          timeout=settings.QUIZ_PRIMARY_PIN_SECONDS)
+                response.set_signed_cookie(
+                    PRIMARY_PIN_COOKIE, str(user_id), salt=PRIMARY_PIN_SALT,
+                    max_age=settings.QUIZ_PRIMARY_PIN_SECONDS, httponly=True,
+                    samesite='Lax'
+                )
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = route_stream(response.streaming_content,
+                                                      use_replica)
+
+        return response
+
+    def is_pinned(self, request, user_id):
+        return request.get_signed_cookie(
+            PRIMARY_PIN_COOKIE, default=None, salt=PRIMARY_PIN_SALT,
+            max_age=settings.QUIZ_PRIMARY_PIN_SECONDS
+        ) == str(user_id) or bool(cache.get(primary_pin_key(user_id)))
+
+    def get_user_id(self, request):
+        header = self.authentication.get_header(request)
+        raw_token = self.authentication.get_raw_token(header) if header else None
+
+        if raw_token is not None:
+            try:
+                return self.authentication.get_validated_token(raw_token).get(
+                    api_settings.USER_ID_CLAIM
+                )
+            except (InvalidToken, TokenError):
+                return None
+
+        user = getattr(request, 'user', None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+
+def route_stream(content, use_replica):
+    """Keep the request's routing while a streaming response is consumed."""
+    chunks = iter(content)
+
+    while True:
+        token = read_from_replica.set(use_replica)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            read_from_replica.reset(token)
+
+        yield chunk
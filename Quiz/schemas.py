@@ -1,4 +1,5 @@
 import graphene
+from graphene_django.fields import DjangoConnectionField, DjangoListField
 from graphene_django.types import DjangoObjectType
 from quiz_app.models import (
     Quiz, 
@@ -7,52 +8,116 @@ from quiz_app.models import (
     QuizAttempt, 
     AttemptedAnswers
 )
+from Quiz.dataloaders import get_loaders
+
+class BatchedConnectionField(DjangoConnectionField):
+    @classmethod
+    def connection_resolver(cls, resolver, connection, default_manager,
+                            queryset_resolver, max_limit, enforce_first_or_last,
+                            root, info, **args):
+        result = super().connection_resolver(
+            resolver, connection, default_manager, queryset_resolver,
+            max_limit, enforce_first_or_last, root, info, **args
+        )
+        get_loaders(info).seen(edge.node for edge in result.edges)
+        return result
 
 class QuizType(DjangoObjectType):
+    questions = DjangoListField(lambda: QuestionType, required=True)
+    attempts = DjangoListField(lambda: QuizAttemptType, required=True)
+
     class Meta:
         model = Quiz
         fields = "__all__"
+        use_connection = True
+
+    def resolve_questions(self, info):
+        return get_loaders(info).questions_by_quiz.load(self.pk)
+
+    def resolve_attempts(self, info):
+        return get_loaders(info).attempts_by_quiz.load(self.pk)
 
 class QuestionType(DjangoObjectType):
+    choices = DjangoListField(lambda: ChoiceType, required=True)
+    attemptedanswers_set = DjangoListField(lambda: AttemptedAnswersType, required=True)
+
     class Meta:
         model = Question
         fields = "__all__"
+        use_connection = True
+
+    def resolve_quiz(self, info):
+        return get_loaders(info).quiz.load(self.quiz_id)
+
+    def resolve_choices(self, info):
+        return get_loaders(info).choices_by_question.load(self.pk)
+
+    def resolve_attemptedanswers_set(self, info):
+        return get_loaders(info).answers_by_question.load(self.pk)
 
 class ChoiceType(DjangoObjectType):
+    attemptedanswers_set = DjangoListField(lambda: AttemptedAnswersType, required=True)
+
     class Meta:
         model = Choice
         fields = "__all__"
+        use_connection = True
+
+    def resolve_question(self, info):
+        return get_loaders(info).question.load(self.question_id)
+
+    def resolve_attemptedanswers_set(self, info):
+        return get_loaders(info).answers_by_choice.load(self.pk)
 
 class QuizAttemptType(DjangoObjectType):
+    answers = DjangoListField(lambda: AttemptedAnswersType, required=True)
+
     class Meta:
         model = QuizAttempt
         fields = "__all__"
+        use_connection = True
+
+    def resolve_quiz(self, info):
+        return get_loaders(info).quiz.load(self.quiz_id)
+
+    def resolve_answers(self, info):
+        return get_loaders(info).answers_by_attempt.load(self.pk)
 
 class AttemptedAnswersType(DjangoObjectType):
     class Meta:
         model = AttemptedAnswers
         fields = "__all__"
+        use_connection = True
+
+    def resolve_attempt(self, info):
+        return get_loaders(info).attempt.load(self.attempt_id)
+
+    def resolve_question(self, info):
+        return get_loaders(info).question.load(self.question_id)
+
+    def resolve_selected_choice(self, info):
+        return get_loaders(info).choice.load(self.selected_choice_id)
 
 class Query(graphene.ObjectType):
-    all_quizzes = graphene.List(QuizType)
-    all_questions = graphene.List(QuestionType)
-    all_choices = graphene.List(ChoiceType)
-    all_attempts = graphene.List(QuizAttemptType)
-    all_answers = graphene.List(AttemptedAnswersType)
+    all_quizzes = BatchedConnectionField(QuizType)
+    all_questions = BatchedConnectionField(QuestionType)
+    all_choices = BatchedConnectionField(ChoiceType)
+    all_attempts = BatchedConnectionField(QuizAttemptType)
+    all_answers = BatchedConnectionField(AttemptedAnswersType)
 
-    def resolve_all_quizzes(self, info):
+    def resolve_all_quizzes(self, info, **kwargs):
         return Quiz.objects.all()
 
-    def resolve_all_questions(self, info):
+    def resolve_all_questions(self, info, **kwargs):
         return Question.objects.all()
 
-    def resolve_all_choices(self, info):
+    def resolve_all_choices(self, info, **kwargs):
         return Choice.objects.all()
 
-    def resolve_all_attempts(self, info):
+    def resolve_all_attempts(self, info, **kwargs):
         return QuizAttempt.objects.all()
 
-    def resolve_all_answers(self, info):
+    def resolve_all_answers(self, info, **kwargs):
         return AttemptedAnswers.objects.all()
 
 class CreateQuiz(graphene.Mutation):
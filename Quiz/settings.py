@@ -1,3 +1,5 @@
+import os
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
 
@@ -35,11 +37,16 @@ INSTALLED_APPS = [
     'quiz_app',
     'rest_framework',
     'rest_framework_simplejwt',
-    'graphene_django'
 ]
 
+# graphene_django is deliberately not an installed app: importing it loads
+# graphene and graphql-core, which only the lazily mounted /graphql/ view
+# needs. Its GraphiQL template and static files are added by path instead.
+GRAPHENE_DJANGO_DIR = Path(find_spec('graphene_django').origin).parent
+
 GRAPHENE = {
     "SCHEMA": "Quiz.schemas.schema",
+    "RELAY_CONNECTION_MAX_LIMIT": 100,
 }
 
 MIDDLEWARE = [
@@ -48,6 +55,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'Quiz.routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,7 +65,7 @@ ROOT_URLCONF = 'Quiz.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [GRAPHENE_DJANGO_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -83,9 +91,57 @@ DATABASES = {
         'PASSWORD': 'db',
         'HOST': 'postgres',
         'PORT': '5432',
+        'CONN_MAX_AGE': int(os.environ.get('QUIZ_DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('QUIZ_DB_CONN_HEALTH_CHECKS', '1') == '1',
     }
 }
 
+# QUIZ_DB_POOL=1 switches to Django's native psycopg 3 connection pool. A
+# pool replaces persistent connections, so CONN_MAX_AGE must be 0, and
+# health checks are done by the pool when a connection is handed out.
+if os.environ.get('QUIZ_DB_POOL') == '1':
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('QUIZ_DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('QUIZ_DB_POOL_MAX_SIZE', 10)),
+            'max_idle': float(os.environ.get('QUIZ_DB_POOL_MAX_IDLE', 300)),
+            'timeout': float(os.environ.get('QUIZ_DB_POOL_TIMEOUT', 10)),
+        },
+    }
+    if DATABASES['default']['CONN_HEALTH_CHECKS']:
+        DATABASES['default']['OPTIONS']['pool']['check'] = ConnectionPool.check_connection
+
+if os.environ.get('QUIZ_REPLICA_DB_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['QUIZ_REPLICA_DB_HOST'],
+        'PORT': os.environ.get('QUIZ_REPLICA_DB_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['Quiz.routers.ReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    }
+}
+
+# Idempotency keys, auth versions, throttles and the grading limiter rely on
+# a cache shared by every worker process; ``manage.py serve`` refuses to
+# start several workers on the per-process local-memory cache.
+if os.environ.get('QUIZ_CACHE_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['QUIZ_CACHE_URL'],
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -119,6 +175,7 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = 'static/'
+STATICFILES_DIRS = [GRAPHENE_DJANGO_DIR / 'static']
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -127,9 +184,105 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'quiz_app.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Sliding windows of the attempt write endpoints: N/period allows N
+    # requests in any period.
+    'DEFAULT_THROTTLE_RATES': {
+        'attempt-user': os.environ.get('QUIZ_THROTTLE_ATTEMPT_USER', '30/min'),
+        'attempt-quiz': os.environ.get('QUIZ_THROTTLE_ATTEMPT_QUIZ', '6000/min'),
+    },
+}
+
+# Quiz application tuning
+
+QUIZ_ANSWER_KEY_CACHE_SIZE = 256
+QUIZ_LEADERBOARD_PAGE_SIZE = 50
+QUIZ_LEADERBOARD_MAX_PAGE_SIZE = 200
+
+QUIZ_GRAPHQL_DOCUMENT_CACHE_SIZE = 500
+QUIZ_GRAPHQL_MAX_DEPTH = 10
+QUIZ_GRAPHQL_MAX_FIELDS = 100
+QUIZ_GRAPHQL_MAX_ROWS = 100000
+QUIZ_GRAPHQL_LIST_FANOUT = {
+    'default': 20,
+    'QuestionType.choices': 5,
+    'QuizType.attempts': 1000,
+    'QuestionType.attemptedanswersSet': 1000,
+    'ChoiceType.attemptedanswersSet': 1000,
+}
+
+QUIZ_EXPORT_CHUNK_SIZE = 500
+QUIZ_ATTEMPT_PAGE_SIZE = 50
+QUIZ_ATTEMPT_MAX_PAGE_SIZE = 200
+QUIZ_ASYNC_GRADING = False
+QUIZ_GRADING_BATCH_SIZE = 50
+QUIZ_GRADING_POLL_INTERVAL = 1
+QUIZ_REGRADE_CHUNK_SIZE = 5000
+QUIZ_TALLY_SHARDS = 8
+QUIZ_LIVE_TICK = 2
+# Kept well below QUIZ_SERVE_TIMEOUT: a sync worker is killed after it, and
+# EventSource clients reconnect after each stream anyway.
+QUIZ_LIVE_STREAM_DURATION = 20
+QUIZ_LIVE_MEMO_SIZE = 256
+QUIZ_REGISTRY_TTL = 60
+QUIZ_AUTH_USER_CACHE_TTL = 30
+QUIZ_AUTH_USER_CACHE_SIZE = 1024
+QUIZ_READ_REPLICA = 'replica' if 'replica' in DATABASES else None
+QUIZ_PRIMARY_PIN_SECONDS = 10
+QUIZ_SERVE_BIND = os.environ.get('QUIZ_SERVE_BIND', '0.0.0.0:8000')
+QUIZ_SERVE_WORKERS = int(os.environ.get('QUIZ_SERVE_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+QUIZ_SERVE_THREADS = int(os.environ.get('QUIZ_SERVE_THREADS', 4))
+QUIZ_SERVE_TIMEOUT = 30
+QUIZ_SERVE_GRACEFUL_TIMEOUT = 30
+QUIZ_SERVE_MAX_REQUESTS = 10000
+QUIZ_SERVE_WARM_UP = True
+QUIZ_STARTUP_BUDGET_MS = 1500
+QUIZ_ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+QUIZ_ADMIN_INLINE_MAX_ROWS = 50
+QUIZ_IDEMPOTENCY_TTL = 24 * 60 * 60
+QUIZ_IDEMPOTENCY_LOCK_TIMEOUT = 60
+QUIZ_IDEMPOTENCY_WAIT = 10
+QUIZ_IDEMPOTENCY_POLL_INTERVAL = 0.05
+QUIZ_THROTTLE_ATTEMPT_CACHE_SIZE = 4096
+# Grading requests (attempt POST/PUT) in progress across all serve workers;
+# None disables the limit. By default one thread of each worker is kept free
+# for the read endpoints.
+QUIZ_GRADING_MAX_CONCURRENCY = int(os.environ.get(
+    'QUIZ_GRADING_MAX_CONCURRENCY', QUIZ_SERVE_WORKERS * max(1, QUIZ_SERVE_THREADS - 1)
+))
+QUIZ_GRADING_QUEUE_TIMEOUT = 0.5
+QUIZ_GRADING_QUEUE_POLL_INTERVAL = 0.05
+QUIZ_GRADING_RETRY_AFTER = 1
+# Per-request budgets checked by ``manage.py bench`` at its default volumes:
+# the worst query count and the p95 latency in milliseconds.
+QUIZ_BENCH_BUDGETS = {
+    'quiz-detail': {'p95_ms': 50, 'queries': 4},
+    'async-quiz-detail': {'p95_ms': 50, 'queries': 4},
+    'quiz-active-list': {'p95_ms': 25, 'queries': 2},
+    'quiz-attempt-list': {'p95_ms': 250, 'queries': 5},
+    'quiz-attempt-list.csv': {'p95_ms': 1000, 'queries': 3},
+    'quiz-leaderboard': {'p95_ms': 50, 'queries': 2},
+    'async-quiz-leaderboard': {'p95_ms': 50, 'queries': 2},
+    'quiz-leaderboard-me': {'p95_ms': 50, 'queries': 2},
+    'quiz-attempt-crud': {'p95_ms': 50, 'queries': 4},
+    'async-quiz-attempt': {'p95_ms': 75, 'queries': 4},
+    'quiz-attempt-status': {'p95_ms': 25, 'queries': 1},
+    'quiz-analytics': {'p95_ms': 50, 'queries': 3},
+    'quiz-live': {'p95_ms': 25, 'queries': 1},
+    'quiz-create': {'p95_ms': 100, 'queries': 5},
+    'quiz-attempt-create': {'p95_ms': 100, 'queries': 11},
+    'quiz-attempt-crud.put': {'p95_ms': 100, 'queries': 16},
+    'quiz-attempt-crud.delete': {'p95_ms': 50, 'queries': 9},
+    'graphql': {'p95_ms': 200, 'queries': 4},
+    'token_obtain_pair': {'p95_ms': 1500, 'queries': 1},
+    'token_refresh': {'p95_ms': 25, 'queries': 0},
+    'token_verify': {'p95_ms': 25, 'queries': 0},
+    'admin-quiz-changelist': {'p95_ms': 1000, 'queries': 5},
+    'admin-attempt-changelist': {'p95_ms': 1000, 'queries': 4},
+    'admin-answer-changelist': {'p95_ms': 1000, 'queries': 4},
+    'admin-attempt-change': {'p95_ms': 500, 'queries': 10},
 }
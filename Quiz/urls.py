@@ -1,3 +1,5 @@
+from functools import cache
+
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
@@ -6,17 +8,33 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
-from quiz_app import views
-from graphene_django.views import GraphQLView
-from Quiz.schemas import schema
+from quiz_app import async_views, views
 from django.views.decorators.csrf import csrf_exempt
 
 router = DefaultRouter()
 
+
+@cache
+def get_graphql_view():
+    from Quiz.graphql_views import CachedGraphQLView
+    from Quiz.schemas import schema
+
+    return CachedGraphQLView.as_view(graphiql=True, schema=schema)
+
+
+@csrf_exempt
+def graphql_view(request, *args, **kwargs):
+    """
+    Mount /graphql/ without importing graphene: the view and the schema are
+    built on the first request to it.
+    """
+    return get_graphql_view()(request, *args, **kwargs)
+
+
 urlpatterns = [
 
     path('admin/', admin.site.urls),
-    path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True, schema=schema))),
+    path("graphql/", graphql_view),
 
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -25,12 +43,21 @@ urlpatterns = [
     path('api/', include(router.urls)),         
 
     path('api/quiz/<int:pk>/', views.QuizDetailView.as_view(), name='quiz-detail'),
+    path('api/quiz/active/', views.ActiveQuizListView.as_view(), name='quiz-active-list'),
     path('api/quiz/<int:quiz_id>/attempt/', views.QuizAttemptListView.as_view(), name='quiz-attempt-list'),
     
     path('api/quiz/create/', views.QuizCreateView.as_view(), name='quiz-create'),
     
     path('api/quiz/attempt/', views.QuizAttemptCRUDView.as_view(), name='quiz-attempt-create'), 
     path('api/quiz/attempt/<int:attempt_id>/', views.QuizAttemptCRUDView.as_view(), name='quiz-attempt-crud'),  
+    path('api/quiz/attempt/<int:attempt_id>/status/', views.QuizAttemptStatusView.as_view(), name='quiz-attempt-status'),
     path('api/quiz/<int:quiz_id>/leaderboard/', views.LeaderboardView.as_view(), name="quiz-leaderboard"),
+    path('api/quiz/<int:quiz_id>/leaderboard/me/', views.LeaderboardRankView.as_view(), name="quiz-leaderboard-me"),
+    path('api/quiz/<int:quiz_id>/analytics/', views.QuizAnalyticsView.as_view(), name="quiz-analytics"),
+    path('api/quiz/<int:quiz_id>/live/', views.QuizLiveCountsView.as_view(), name="quiz-live"),
+
+    path('api/async/quiz/<int:pk>/', async_views.AsyncQuizDetailView.as_view(), name='async-quiz-detail'),
+    path('api/async/quiz/<int:quiz_id>/leaderboard/', async_views.AsyncLeaderboardView.as_view(), name='async-quiz-leaderboard'),
+    path('api/async/quiz/attempt/<int:attempt_id>/', async_views.AsyncQuizAttemptView.as_view(), name='async-quiz-attempt'),
 
 ]
@@ -1,13 +1,151 @@
+import json
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+
+from quiz_app.grading import regrade_quiz
 from quiz_app.models import (
-    Quiz, 
-    Question, 
-    Choice, 
-    QuizAttempt, 
+    Quiz,
+    Question,
+    Choice,
+    QuizAttempt,
     AttemptedAnswers
 )
 
 
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for ``queryset`` on PostgreSQL, or
+    None on backends that do not provide one.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return plan[0]['Plan']['Plan Rows']
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the planner's estimate instead of an exact
+    ``COUNT(*)`` once a changelist has QUIZ_ADMIN_ESTIMATED_COUNT_THRESHOLD
+    rows or more, so large tables paginate in constant time.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+
+        if estimate is not None and estimate >= settings.QUIZ_ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+
+        return super().count
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """
+    Foreign key filter with an autocomplete box, served by the admin's
+    autocomplete view, instead of a sidebar link for every related row.
+    Create one with ``autocomplete_filter(field_name)``.
+    """
+
+    template = 'admin/quiz_app/autocomplete_filter.html'
+    field_name = None
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+
+        try:
+            return queryset.filter(**{f"{self.field_name}__pk": self.value()})
+        except (ValueError, ValidationError) as e:
+            raise IncorrectLookupParameters(e)
+
+    def choices(self, changelist):
+        field = changelist.model._meta.get_field(self.field_name)
+        choice_field = forms.ModelChoiceField(
+            queryset=field.related_model._default_manager.all(),
+            widget=AutocompleteSelect(field, changelist.model_admin.admin_site,
+                                      attrs={'onchange': 'this.form.submit()'}),
+            required=False
+        )
+
+        yield {
+            'selected': self.value() is not None,
+            'widget': choice_field.widget.render(
+                self.parameter_name,
+                self.value(),
+                attrs={'id': f"{self.parameter_name}_filter"}
+            ),
+            'params': [
+                (name, value)
+                for name, values in changelist.filter_params.items()
+                if name != self.parameter_name
+                for value in values
+            ],
+            'clear_url': changelist.get_query_string(remove=[self.parameter_name]),
+        }
+
+
+def autocomplete_filter(field_name):
+    return type(
+        f"{field_name.title()}AutocompleteFilter",
+        (AutocompleteFilter,),
+        {
+            'title': field_name.replace('_', ' '),
+            'parameter_name': f"{field_name}__id__exact",
+            'field_name': field_name,
+        }
+    )
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin for tables that grow with the number of attempts: no exact
+    counts over the whole table, and the media of autocomplete filters.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        media = super().media
+        autocomplete_filters = [
+            list_filter for list_filter in self.list_filter
+            if isinstance(list_filter, type) and issubclass(list_filter, AutocompleteFilter)
+        ]
+
+        if autocomplete_filters:
+            field = self.model._meta.get_field(autocomplete_filters[0].field_name)
+            media += AutocompleteSelect(field, self.admin_site).media
+
+        return media
+
+
+class CappedInlineFormSet(BaseInlineFormSet):
+    @cached_property
+    def capped_queryset(self):
+        return super().get_queryset()[:settings.QUIZ_ADMIN_INLINE_MAX_ROWS]
+
+    def get_queryset(self):
+        return self.capped_queryset
+
+
 class ChoiceInline(admin.TabularInline):
     model = Choice
     extra = 1
@@ -19,44 +157,86 @@ class QuestionInline(admin.TabularInline):
 
 
 class AttemptedAnswersInline(admin.TabularInline):
+    """
+    Read-only answers of an attempt, capped at QUIZ_ADMIN_INLINE_MAX_ROWS;
+    all of them are listed in the answers changelist filtered by attempt.
+    """
+
     model = AttemptedAnswers
+    formset = CappedInlineFormSet
+    fields = ('question', 'selected_choice', 'is_correct', 'points_awarded')
+    readonly_fields = fields
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'question__quiz', 'selected_choice__question'
+        )
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(Quiz)
 class QuizAdmin(admin.ModelAdmin):
     list_display = ('id', 'title', 'creator', 'start_time', 'end_time', 'is_active')
     list_filter = ('is_active', 'start_time', 'end_time')
+    list_select_related = ('creator',)
     search_fields = ('title', 'creator__username')
+    autocomplete_fields = ('creator',)
     inlines = [QuestionInline]
+    actions = ['regrade_attempts']
+
+    @admin.action(description="Regrade attempts of selected quizzes")
+    def regrade_attempts(self, request, queryset):
+        regraded = sum(regrade_quiz(quiz) for quiz in queryset)
+        self.message_user(
+            request,
+            f"Regraded {regraded} attempts of {len(queryset)} quizzes."
+        )
 
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(LargeTableAdmin):
     list_display = ('text', 'quiz')
     search_fields = ('text',)
-    list_filter = ('quiz',)
+    list_filter = (autocomplete_filter('quiz'),)
+    list_select_related = ('quiz',)
+    autocomplete_fields = ('quiz',)
     inlines = [ChoiceInline]
 
 
 @admin.register(Choice)
-class ChoiceAdmin(admin.ModelAdmin):
+class ChoiceAdmin(LargeTableAdmin):
     list_display = ('id', 'text', 'question', 'is_correct')
-    list_filter = ('question', 'is_correct')
+    list_filter = (autocomplete_filter('question'), 'is_correct')
+    list_select_related = ('question__quiz',)
     search_fields = ('text',)
+    autocomplete_fields = ('question',)
 
 
 @admin.register(QuizAttempt)
-class QuizAttemptAdmin(admin.ModelAdmin):
+class QuizAttemptAdmin(LargeTableAdmin):
     list_display = ('id', 'user', 'quiz', 'start_time', 'end_time', 'score')
-    list_filter = ('quiz', 'start_time', 'end_time')
+    list_filter = (autocomplete_filter('quiz'), 'start_time', 'end_time')
+    list_select_related = ('user', 'quiz')
     search_fields = ('user__username', 'quiz__title')
+    autocomplete_fields = ('user', 'quiz')
     inlines = [AttemptedAnswersInline]
 
 
 @admin.register(AttemptedAnswers)
-class AttemptedAnswersAdmin(admin.ModelAdmin):
+class AttemptedAnswersAdmin(LargeTableAdmin):
     list_display = ('id', 'attempt', 'question', 'selected_choice', 'is_correct', 'points_awarded')
-    list_filter = ('is_correct', 'question')
+    list_filter = ('is_correct', autocomplete_filter('attempt'), autocomplete_filter('question'))
+    list_select_related = (
+        'attempt__user', 'attempt__quiz', 'question__quiz', 'selected_choice__question'
+    )
     search_fields = ('question__text', 'selected_choice__text')
-    
\ No newline at end of file
+    autocomplete_fields = ('attempt', 'question', 'selected_choice')
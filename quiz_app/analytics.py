@@ -0,0 +1,135 @@
+import math
+
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Q, Subquery
+
+from quiz_app.models import AttemptedAnswers, Choice, Quiz, QuizAttempt
+
+
+def quiz_analytics_cache_key(quiz_id, version, attempt_count, last_answer_id):
+    return f"quiz-analytics:{quiz_id}:{version}:{attempt_count}:{last_answer_id}"
+
+
+def rounded(value):
+    return None if value is None or math.isnan(value) else round(float(value), 4)
+
+
+def compute_item_analytics(choices, answers):
+    """
+    Compute item statistics from the quiz structure and its answer matrix.
+
+    ``choices`` holds ``(choice_id, question_id, question_text, choice_text,
+    is_correct)`` rows and ``answers`` holds ``(attempt_id, question_id,
+    selected_choice_id, is_correct, points_awarded)`` rows. Unanswered
+    questions count as incorrect for p-values and point-biserial
+    correlations, which are taken against the attempt's total score.
+    """
+    # NumPy is imported here, not at module level, so that loading the URLconf
+    # does not pay for it in every worker and management command.
+    import numpy as np
+
+    question_ids = sorted({row[1] for row in choices})
+    question_index = {question_id: i for i, question_id in enumerate(question_ids)}
+
+    answers = np.array(answers, dtype=float).reshape(-1, 5)
+    attempt_ids, attempt_rows = np.unique(answers[:, 0], return_inverse=True)
+    attempts = len(attempt_ids)
+
+    known = np.isin(answers[:, 1], question_ids)
+    answers, attempt_rows = answers[known], attempt_rows[known]
+    columns = np.searchsorted(question_ids, answers[:, 1])
+
+    correct = np.zeros((attempts, len(question_ids)))
+    np.add.at(correct, (attempt_rows, columns), answers[:, 3])
+    correct = np.minimum(correct, 1)
+    totals = np.bincount(attempt_rows, weights=answers[:, 4], minlength=attempts)
+
+    answered = np.bincount(columns, minlength=len(question_ids))
+
+    if attempts:
+        p_values = correct.mean(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = ((correct - p_values) * (totals - totals.mean())[:, None]).mean(axis=0)
+            point_biserial = covariance / (correct.std(axis=0) * totals.std())
+    else:
+        p_values = point_biserial = np.full(len(question_ids), np.nan)
+
+    choice_ids, choice_counts = np.unique(answers[:, 2], return_counts=True)
+    selections = dict(zip(choice_ids.astype(int).tolist(), choice_counts.tolist()))
+
+    questions = {}
+    for choice_id, question_id, question_text, choice_text, is_correct in choices:
+        i = question_index[question_id]
+        question = questions.setdefault(question_id, {
+            "question_id": question_id,
+            "text": question_text,
+            "answered": int(answered[i]),
+            "p_value": rounded(p_values[i]),
+            "point_biserial": rounded(point_biserial[i]),
+            "choices": [],
+        })
+        question["choices"].append({
+            "choice_id": choice_id,
+            "text": choice_text,
+            "is_correct": is_correct,
+            "selection_rate": (
+                rounded(selections.get(choice_id, 0) / answered[i]) if answered[i] else None
+            ),
+        })
+
+    return {
+        "attempts": attempts,
+        "questions": [questions[question_id] for question_id in question_ids],
+    }
+
+
+def get_quiz_analytics(quiz_id):
+    """
+    Return item analytics of a quiz, or ``None`` if it does not exist.
+
+    Results are cached under the quiz version, the number of graded
+    attempts and the id of the latest answer, so they are recomputed only
+    when the answer key changes, the quiz is regraded, new attempts are
+    graded or an attempt's answers are replaced.
+    """
+    quiz = (
+        Quiz.objects.filter(id=quiz_id)
+        .annotate(graded_attempts=Count(
+            'attempts',
+            filter=Q(attempts__status=QuizAttempt.Status.GRADED)
+        ))
+        .annotate(last_answer_id=Subquery(
+            AttemptedAnswers.objects.filter(attempt__quiz_id=OuterRef('id'))
+            .order_by('-id')
+            .values('id')[:1]
+        ))
+        .values('version', 'graded_attempts', 'last_answer_id')
+        .first()
+    )
+
+    if quiz is None:
+        return None
+
+    key = quiz_analytics_cache_key(quiz_id, quiz['version'], quiz['graded_attempts'],
+                                   quiz['last_answer_id'])
+    analytics = cache.get(key)
+
+    if analytics is None:
+        choices = (
+            Choice.objects.filter(question__quiz_id=quiz_id)
+            .order_by('question_id', 'id')
+            .values_list('id', 'question_id', 'question__text', 'text', 'is_correct')
+        )
+        answers = (
+            AttemptedAnswers.objects.filter(
+                attempt__quiz_id=quiz_id,
+                attempt__status=QuizAttempt.Status.GRADED
+            )
+            .order_by()
+            .values_list('attempt_id', 'question_id', 'selected_choice_id',
+                         'is_correct', 'points_awarded')
+        )
+        analytics = compute_item_analytics(list(choices), list(answers))
+        cache.set(key, analytics)
+
+    return analytics
@@ -0,0 +1,116 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+
+from quiz_app import leaderboard
+from quiz_app.authentication import CachedJWTAuthentication
+from quiz_app.models import Quiz, QuizAttempt
+from quiz_app.payloads import aget_quiz_detail, quiz_detail_response
+from quiz_app.serializers import QuizAttemptSerializer
+from quiz_app.views import get_int_param, get_ranking
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(
+        JSONRenderer().render(data),
+        content_type='application/json',
+        status=status
+    )
+
+
+class AsyncAPIView(View):
+    """
+    Async base view for read-only endpoints served under ASGI.
+
+    DRF's APIView dispatches synchronously, so this keeps only the parts of
+    it these endpoints need: JWT authentication, the IsAuthenticated check
+    and DRF-shaped error responses. Database access in the handlers goes
+    through the async ORM interface.
+    """
+
+    authentication = CachedJWTAuthentication()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user_auth = await sync_to_async(self.authentication.authenticate)(request)
+            if user_auth is None:
+                raise NotAuthenticated()
+            request.user, request.auth = user_auth
+
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail
+            if not isinstance(detail, (dict, list)):
+                detail = {"detail": detail}
+
+            response = json_response(detail, status=exc.status_code)
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                response['WWW-Authenticate'] = self.authentication.authenticate_header(request)
+            return response
+
+
+class AsyncQuizDetailView(AsyncAPIView):
+    async def get(self, request, pk):
+        payload = await aget_quiz_detail(pk)
+
+        if payload is None:
+            return json_response(
+                {"detail": "Quiz not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return quiz_detail_response(request, payload)
+
+
+class AsyncLeaderboardView(AsyncAPIView):
+    async def get(self, request, quiz_id):
+        quiz = await Quiz.objects.only('id', 'title').filter(id=quiz_id).afirst()
+
+        if quiz is None:
+            return json_response(
+                {"detail": "Quiz not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        ranking = get_ranking(request.GET)
+        offset = get_int_param(request.GET, 'offset', 0)
+        limit = get_int_param(
+            request.GET, 'limit',
+            settings.QUIZ_LEADERBOARD_PAGE_SIZE,
+            minimum=1,
+            maximum=settings.QUIZ_LEADERBOARD_MAX_PAGE_SIZE
+        )
+
+        rows, has_more = await leaderboard.atop_entries(quiz.id, offset, limit, ranking)
+
+        return json_response(
+            {
+                "quiz_title": quiz.title,
+                "leaderboard": rows,
+                "next_offset": offset + limit if has_more else None,
+            }
+        )
+
+
+class AsyncQuizAttemptView(AsyncAPIView):
+    async def get(self, request, attempt_id):
+        try:
+            quiz_attempt = await (
+                QuizAttempt.objects.select_related('quiz', 'user')
+                .prefetch_related('answers__question', 'answers__selected_choice')
+                .aget(
+                    id=attempt_id,
+                    user=request.user
+                )
+            )
+        except QuizAttempt.DoesNotExist:
+            return json_response(
+                {"detail": "Quiz attempt not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return json_response(QuizAttemptSerializer(quiz_attempt).data)
@@ -0,0 +1,84 @@
+import copy
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from quiz_app.caching import LRUCache
+
+
+user_cache = LRUCache(getattr(settings, 'QUIZ_AUTH_USER_CACHE_SIZE', 1024))
+
+
+def auth_version_key(user_id):
+    return f"auth-version:{user_id}"
+
+
+def get_auth_version(user_id):
+    """
+    Return the user's auth version, a random token, creating one if the
+    cache has none. A version that was evicted or lost is replaced by a new
+    token, never by an earlier one, so it cannot revive stale entries.
+    """
+    key = auth_version_key(user_id)
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_auth_version(user_id):
+    cache.set(auth_version_key(user_id), uuid.uuid4().hex, timeout=None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves users from a per-process cache instead of
+    loading the user row on every request.
+
+    Entries live for QUIZ_AUTH_USER_CACHE_TTL seconds and are keyed by user
+    id and the user's auth version, which is kept in the Django cache and
+    replaced whenever the user is saved or deleted (e.g. deactivated or
+    given a new password). Such changes take effect on the next request in
+    every process that shares the cache, which ``serve`` requires of
+    multiple workers; with a per-process cache, other processes only see
+    them once their entries expire.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = (user_id, get_auth_version(user_id))
+        cached = user_cache.get(key)
+
+        if cached is not None and cached[0] > time.monotonic():
+            user = copy.copy(cached[1])
+            self.check_revoked(validated_token, user)
+            return user
+
+        user = super().get_user(validated_token)
+        user_cache.set(
+            key,
+            (time.monotonic() + settings.QUIZ_AUTH_USER_CACHE_TTL, copy.copy(user))
+        )
+        return user
+
+    @staticmethod
+    def check_revoked(validated_token, user):
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                "The user's password has been changed.", code="password_changed"
+            )
@@ -0,0 +1,33 @@
+from quiz_app.models import Quiz, Question, Choice
+
+
+def create_quizzes(creator, quizzes_data):
+    """
+    Insert validated quizzes with their questions and choices using one
+    bulk INSERT per table, whatever the number of rows. Callers own the
+    transaction.
+    """
+    quizzes = []
+    questions = []
+    question_choices = []
+
+    for quiz_data in quizzes_data:
+        fields = {key: value for key, value in quiz_data.items() if key != 'questions'}
+        quiz = Quiz(creator=creator, **fields)
+        quiz.refresh_is_active()
+        quizzes.append(quiz)
+
+        for question_data in quiz_data.get('questions', []):
+            questions.append(Question(quiz=quiz, text=question_data['text']))
+            question_choices.append(question_data.get('choices', []))
+
+    Quiz.objects.bulk_create(quizzes)
+    Question.objects.bulk_create(questions)
+
+    Choice.objects.bulk_create([
+        Choice(question=question, **choice_data)
+        for question, choices_data in zip(questions, question_choices)
+        for choice_data in choices_data
+    ])
+
+    return quizzes
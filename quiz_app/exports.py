@@ -0,0 +1,67 @@
+import csv
+import json
+
+from django.conf import settings
+from django.db.models import Prefetch
+from rest_framework.utils.encoders import JSONEncoder
+
+from quiz_app.models import QuizAttempt, AttemptedAnswers
+from quiz_app.serializers import QuizAttemptSerializer
+
+
+CSV_ATTEMPT_FIELDS = ['id', 'user_username', 'quiz_title', 'start_time',
+                      'end_time', 'score', 'feedback']
+CSV_ANSWER_FIELDS = ['id', 'question_text', 'selected_choice_text',
+                     'is_correct', 'points_awarded']
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def iter_quiz_attempts(quiz_id):
+    """
+    Yield serialized attempts of a quiz one at a time. Rows are fetched in
+    chunks of QUIZ_EXPORT_CHUNK_SIZE (a server-side cursor on PostgreSQL)
+    and answers are prefetched per chunk, so memory stays bounded.
+    """
+    attempts = (
+        QuizAttempt.objects.filter(quiz_id=quiz_id)
+        .select_related('quiz', 'user')
+        .prefetch_related(
+            Prefetch(
+                'answers',
+                queryset=AttemptedAnswers.objects.select_related(
+                    'question', 'selected_choice'
+                )
+            )
+        )
+        .order_by('id')
+        .iterator(chunk_size=settings.QUIZ_EXPORT_CHUNK_SIZE)
+    )
+
+    for attempt in attempts:
+        yield QuizAttemptSerializer(attempt).data
+
+
+def stream_ndjson(quiz_id):
+    for attempt in iter_quiz_attempts(quiz_id):
+        yield json.dumps(attempt, cls=JSONEncoder) + '\n'
+
+
+def stream_csv(quiz_id):
+    writer = csv.writer(Echo())
+    yield writer.writerow(
+        [f'attempt_{field}' for field in CSV_ATTEMPT_FIELDS]
+        + [f'answer_{field}' for field in CSV_ANSWER_FIELDS]
+    )
+
+    for attempt in iter_quiz_attempts(quiz_id):
+        attempt_row = [attempt[field] for field in CSV_ATTEMPT_FIELDS]
+        answers = attempt['answers'] or [dict.fromkeys(CSV_ANSWER_FIELDS, '')]
+
+        for answer in answers:
+            yield writer.writerow(
+                attempt_row + [answer[field] for field in CSV_ANSWER_FIELDS]
+            )
@@ -0,0 +1,252 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from quiz_app.caching import LRUCache
+from quiz_app.models import Choice, AttemptedAnswers, LeaderboardEntry, Quiz, QuizAttempt
+from quiz_app.tallies import add_tallies
+
+
+logger = logging.getLogger(__name__)
+
+
+POINTS_PER_QUESTION = 10
+
+answer_key_cache = LRUCache(
+    getattr(settings, 'QUIZ_ANSWER_KEY_CACHE_SIZE', 256)
+)
+
+
+class AnswerKey:
+    """Choices and correct answers of one quiz, loaded in a single query."""
+
+    def __init__(self, rows):
+        self.choices = {}
+        self.correct = {}
+
+        for choice_id, question_id, is_correct in rows:
+            self.choices.setdefault(question_id, set()).add(choice_id)
+            correct = self.correct.setdefault(question_id, set())
+            if is_correct:
+                correct.add(choice_id)
+
+        self.choices = {key: frozenset(value) for key, value in self.choices.items()}
+        self.correct = {key: frozenset(value) for key, value in self.correct.items()}
+
+        self.points = {
+            question_id: POINTS_PER_QUESTION / len(correct) if correct else 0
+            for question_id, correct in self.correct.items()
+        }
+
+    @classmethod
+    def load(cls, quiz_id):
+        rows = (
+            Choice.objects.filter(question__quiz_id=quiz_id)
+            .values_list('id', 'question_id', 'is_correct')
+        )
+        return cls(rows)
+
+    def has_question(self, question_id):
+        return question_id in self.choices
+
+    def has_choice(self, question_id, choice_id):
+        return choice_id in self.choices.get(question_id, ())
+
+    def grade(self, question_id, choice_id):
+        is_correct = choice_id in self.correct.get(question_id, ())
+        points = self.points[question_id] if is_correct else 0
+        return is_correct, points
+
+
+def get_answer_key(quiz):
+    """
+    Return the answer key of ``quiz``, cached per worker under the quiz
+    version, which is bumped whenever one of its questions or choices changes.
+    """
+    cache_key = (quiz.pk, quiz.version)
+    answer_key = answer_key_cache.get(cache_key)
+
+    if answer_key is None:
+        answer_key = AnswerKey.load(quiz.pk)
+        answer_key_cache.set(cache_key, answer_key)
+
+    return answer_key
+
+
+def preload_answer_keys(quizzes):
+    """
+    Load the answer keys of ``quizzes`` into the per-worker cache with one
+    query for all of them and return how many were loaded.
+    """
+    versions = {quiz.pk: quiz.version for quiz in quizzes}
+    rows = {quiz_id: [] for quiz_id in versions}
+
+    choices = (
+        Choice.objects.filter(question__quiz_id__in=versions)
+        .values_list('question__quiz_id', 'id', 'question_id', 'is_correct')
+    )
+    for quiz_id, *row in choices:
+        rows[quiz_id].append(row)
+
+    for quiz_id, quiz_rows in rows.items():
+        answer_key_cache.set((quiz_id, versions[quiz_id]), AnswerKey(quiz_rows))
+
+    return len(rows)
+
+
+def record_answers(attempt, answers_data, answer_key):
+    attempted_answers = []
+
+    for answer_data in answers_data:
+        question_id = answer_data['question']
+        selected_choice_id = answer_data['selected_choice']
+        is_correct, points = answer_key.grade(question_id, selected_choice_id)
+
+        attempted_answers.append(
+            AttemptedAnswers(
+                attempt=attempt,
+                question_id=question_id,
+                selected_choice_id=selected_choice_id,
+                is_correct=is_correct,
+                points_awarded=points
+            )
+        )
+    AttemptedAnswers.objects.bulk_create(attempted_answers)
+    add_tallies(attempt.quiz_id, attempt.pk,
+                [answer.selected_choice_id for answer in attempted_answers])
+
+    return sum(answer.points_awarded for answer in attempted_answers)
+
+
+def grade_pending_attempts(batch_size):
+    """
+    Grade up to ``batch_size`` attempts submitted for write-behind grading
+    and return how many were processed.
+
+    Rows are read with ``SELECT ... FOR UPDATE SKIP LOCKED`` where the
+    backend supports it and each attempt is then claimed with a conditional
+    UPDATE, so any number of workers can drain the queue concurrently
+    without grading an attempt twice. An attempt whose answers no longer
+    fit the quiz is marked as failed instead of blocking the queue.
+    """
+    processed = 0
+
+    with transaction.atomic():
+        attempts = list(
+            QuizAttempt.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('quiz', 'user')
+            .filter(status=QuizAttempt.Status.PENDING)
+            .order_by('id')[:batch_size]
+        )
+
+        for attempt in attempts:
+            claimed = QuizAttempt.objects.filter(
+                pk=attempt.pk,
+                status=QuizAttempt.Status.PENDING
+            ).update(status=QuizAttempt.Status.GRADED, pending_answers=None)
+
+            if not claimed:
+                continue
+
+            try:
+                answer_key = get_answer_key(attempt.quiz)
+                for answer in attempt.pending_answers:
+                    if not answer_key.has_choice(answer['question'],
+                                                 answer['selected_choice']):
+                        raise ValueError("Answers no longer match the quiz.")
+
+                with transaction.atomic():
+                    total_score = record_answers(attempt, attempt.pending_answers,
+                                                 answer_key)
+                    attempt.calculate_score(total_score)
+            except Exception:
+                logger.exception("Grading quiz attempt %s failed.", attempt.pk)
+                QuizAttempt.objects.filter(pk=attempt.pk).update(
+                    status=QuizAttempt.Status.FAILED,
+                    pending_answers=attempt.pending_answers
+                )
+
+            processed += 1
+
+    return processed
+
+
+def regrade_quiz(quiz, chunk_size=None):
+    """
+    Recompute ``is_correct``/``points_awarded`` of every answer and the score
+    of every attempt of ``quiz`` against its current answer key.
+
+    Everything happens in set-based UPDATEs, one transaction per chunk of
+    ``chunk_size`` of the quiz's attempts, so only attempt ids are loaded
+    into Python and locks are held only for one chunk at a time. The quiz version is bumped afterwards
+    so results cached under it are recomputed. Returns the number of
+    attempts regraded.
+    """
+    chunk_size = chunk_size or settings.QUIZ_REGRADE_CHUNK_SIZE
+    answer_key = AnswerKey.load(quiz.pk)
+
+    correct_by_points = {}
+    for question_id, correct in answer_key.correct.items():
+        correct_by_points.setdefault(answer_key.points[question_id], set()).update(correct)
+    correct_choices = set().union(*correct_by_points.values())
+
+    is_correct = Case(
+        When(selected_choice_id__in=correct_choices, then=Value(True)),
+        default=Value(False)
+    )
+    points_awarded = Case(
+        *(
+            When(selected_choice_id__in=choices, then=Value(points))
+            for points, choices in correct_by_points.items()
+        ),
+        default=Value(0.0),
+        output_field=FloatField()
+    )
+    total_points = (
+        AttemptedAnswers.objects.filter(attempt_id=OuterRef('pk'))
+        .order_by()
+        .values('attempt_id')
+        .annotate(total=Sum('points_awarded'))
+        .values('total')
+    )
+    attempt_score = QuizAttempt.objects.filter(pk=OuterRef('attempt_id')).values('score')
+
+    regraded = 0
+    last_id = 0
+    while True:
+        # Keyset chunks over this quiz's attempts only, however many other
+        # quizzes' attempts are interleaved with them in the id space.
+        attempt_ids = list(
+            QuizAttempt.objects.filter(quiz=quiz, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not attempt_ids:
+            break
+        last_id = attempt_ids[-1]
+        chunk = Q(attempt_id__in=attempt_ids)
+
+        with transaction.atomic():
+            AttemptedAnswers.objects.filter(
+                chunk,
+                question_id__in=answer_key.choices.keys()
+            ).update(is_correct=is_correct, points_awarded=points_awarded)
+
+            regraded += QuizAttempt.objects.filter(
+                id__in=attempt_ids,
+                status=QuizAttempt.Status.GRADED
+            ).update(score=Coalesce(Subquery(total_points), Value(0.0)))
+
+            LeaderboardEntry.objects.filter(chunk, quiz=quiz).update(
+                score=Subquery(attempt_score)
+            )
+
+        if len(attempt_ids) < chunk_size:
+            break
+
+    Quiz.objects.filter(pk=quiz.pk).update(version=F('version') + 1)
+
+    return regraded
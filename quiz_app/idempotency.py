@@ -0,0 +1,158 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Executions started by this process, so duplicates arriving here wait on an
+# event instead of polling the cache.
+in_flight = {}
+in_flight_lock = threading.Lock()
+
+
+def idempotency_cache_key(user_id, key):
+    return f"idempotency:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def request_hash(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+
+    payload = json.dumps([request.method, request.path, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def claim(cache_key, fingerprint):
+    """
+    Mark ``cache_key`` as in flight and return the event its duplicates wait
+    on, or None when another request holds or has completed it.
+    """
+    with in_flight_lock:
+        if cache_key in in_flight or not cache.add(
+            cache_key, {'hash': fingerprint}, timeout=settings.QUIZ_IDEMPOTENCY_LOCK_TIMEOUT
+        ):
+            return None
+
+        event = in_flight[cache_key] = threading.Event()
+        return event
+
+
+def release(cache_key, fingerprint, event, response):
+    """
+    Store the response of a completed execution and wake its duplicates.
+    Server errors are not stored, so a retry executes the request again.
+    """
+    try:
+        if response is not None and response.status_code < 500:
+            cache.set(
+                cache_key,
+                {
+                    'hash': fingerprint,
+                    'status': response.status_code,
+                    'data': response.data,
+                    'headers': {
+                        name: value for name, value in response.items()
+                        if name.lower() != 'content-type'
+                    },
+                },
+                timeout=settings.QUIZ_IDEMPOTENCY_TTL
+            )
+        else:
+            cache.delete(cache_key)
+    finally:
+        with in_flight_lock:
+            in_flight.pop(cache_key, None)
+        event.set()
+
+
+def wait(cache_key, deadline):
+    with in_flight_lock:
+        event = in_flight.get(cache_key)
+
+    timeout = min(settings.QUIZ_IDEMPOTENCY_POLL_INTERVAL, max(0, deadline - time.monotonic()))
+    if event is not None:
+        event.wait(timeout)
+    else:
+        time.sleep(timeout)
+
+
+def replay(entry):
+    return Response(
+        entry['data'],
+        status=entry['status'],
+        headers={**entry['headers'], 'Idempotent-Replayed': 'true'}
+    )
+
+
+def idempotent(view_method):
+    """
+    Make an APIView method honour the ``Idempotency-Key`` request header.
+
+    The response to a key is kept in the Django cache for
+    QUIZ_IDEMPOTENCY_TTL seconds, per user, with a hash of the request, and
+    returned again for a retry with the same key and request. Duplicates
+    that arrive while the first request is still running wait up to
+    QUIZ_IDEMPOTENCY_WAIT seconds for its response instead of executing
+    again. Reusing a key for a different request is rejected with 422.
+    Requests without the header are not affected.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+
+        if key is None:
+            return view_method(self, request, *args, **kwargs)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cache_key = idempotency_cache_key(request.user.pk, key)
+        fingerprint = request_hash(request)
+        deadline = time.monotonic() + settings.QUIZ_IDEMPOTENCY_WAIT
+
+        while True:
+            event = claim(cache_key, fingerprint)
+            if event is not None:
+                break
+
+            entry = cache.get(cache_key)
+            if entry is not None:
+                if entry['hash'] != fingerprint:
+                    return Response(
+                        {"detail": f"This {IDEMPOTENCY_HEADER} was used for a different request."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+
+                if 'status' in entry:
+                    return replay(entry)
+
+            if time.monotonic() >= deadline:
+                return Response(
+                    {"detail": f"A request with this {IDEMPOTENCY_HEADER} is still being processed."},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Retry-After': '1'}
+                )
+
+            wait(cache_key, deadline)
+
+        response = None
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            return response
+        finally:
+            release(cache_key, fingerprint, event, response)
+
+    return wrapper
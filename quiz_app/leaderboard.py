@@ -0,0 +1,74 @@
+from quiz_app.models import LeaderboardEntry
+
+
+COMPETITION = 'competition'
+DENSE = 'dense'
+RANKINGS = (COMPETITION, DENSE)
+
+
+def higher_scores(quiz_id, score, ranking=COMPETITION):
+    higher = LeaderboardEntry.objects.filter(quiz_id=quiz_id, score__gt=score)
+
+    if ranking == DENSE:
+        return higher.values('score').distinct()
+
+    return higher
+
+
+def rank_for_score(quiz_id, score, ranking=COMPETITION):
+    return higher_scores(quiz_id, score, ranking).count() + 1
+
+
+async def arank_for_score(quiz_id, score, ranking=COMPETITION):
+    return await higher_scores(quiz_id, score, ranking).acount() + 1
+
+
+def page_entries(quiz_id, offset, limit):
+    return (
+        LeaderboardEntry.objects.filter(quiz_id=quiz_id)
+        .order_by('-score', 'attempt_id')
+        .values_list('username', 'score')[offset:offset + limit + 1]
+    )
+
+
+def rank_page(entries, offset, limit, ranking, first_rank):
+    has_more = len(entries) > limit
+    rows = []
+    rank = None
+    previous_score = None
+
+    for position, (username, score) in enumerate(entries[:limit], start=offset):
+        if rank is None:
+            rank = first_rank
+        elif score != previous_score:
+            rank = rank + 1 if ranking == DENSE else position + 1
+
+        rows.append({"username": username, "score": score, "rank": rank})
+        previous_score = score
+
+    return rows, has_more
+
+
+def top_entries(quiz_id, offset, limit, ranking=COMPETITION):
+    """
+    Return one page of the quiz leaderboard as ``(rows, has_more)``.
+
+    The page is read straight off the (quiz, -score) index; only the first
+    row of a page past the top needs an extra count to anchor its rank,
+    the remaining ranks follow from the sorted order.
+    """
+    entries = list(page_entries(quiz_id, offset, limit))
+    first_rank = 1
+    if offset and entries:
+        first_rank = rank_for_score(quiz_id, entries[0][1], ranking)
+
+    return rank_page(entries, offset, limit, ranking, first_rank)
+
+
+async def atop_entries(quiz_id, offset, limit, ranking=COMPETITION):
+    entries = [entry async for entry in page_entries(quiz_id, offset, limit)]
+    first_rank = 1
+    if offset and entries:
+        first_rank = await arank_for_score(quiz_id, entries[0][1], ranking)
+
+    return rank_page(entries, offset, limit, ranking, first_rank)
@@ -0,0 +1,446 @@
+import random
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from quiz_app.grading import POINTS_PER_QUESTION
+from quiz_app.models import (
+    AttemptedAnswers,
+    Choice,
+    ChoiceTally,
+    LeaderboardEntry,
+    Question,
+    Quiz,
+    QuizAttempt,
+)
+
+
+BENCH_PASSWORD = 'bench-password'
+
+GRAPHQL_QUERY = """
+    query {
+        allQuizzes(first: 10) {
+            edges { node { title questions { text choices { text } } } }
+        }
+    }
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with synthetic quizzes and attempts, "
+        "run every endpoint through the test client and report p50/p95/p99 "
+        "latency, SQL queries and peak memory per request. Fails when an "
+        "endpoint exceeds its budget in QUIZ_BENCH_BUDGETS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200,
+                            help="Users seeded (default: 200).")
+        parser.add_argument('--quizzes', type=int, default=20,
+                            help="Quizzes seeded (default: 20).")
+        parser.add_argument('--questions', type=int, default=10,
+                            help="Questions per quiz (default: 10).")
+        parser.add_argument('--choices', type=int, default=4,
+                            help="Choices per question (default: 4).")
+        parser.add_argument('--attempts', type=int, default=100,
+                            help="Attempts per quiz, each by a different user (default: 100).")
+        parser.add_argument('--requests', type=int, default=50,
+                            help="Timed requests per endpoint (default: 50).")
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help="Only run this endpoint; can be repeated.")
+
+    def handle(self, *args, **options):
+        for name in ('users', 'quizzes', 'questions', 'requests'):
+            if options[name] < 1:
+                raise CommandError(f"--{name} must be at least 1.")
+
+        if options['choices'] < 2:
+            raise CommandError("--choices must be at least 2.")
+
+        if not 1 <= options['attempts'] <= options['users']:
+            raise CommandError("--attempts must be between 1 and --users.")
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+
+        try:
+            # The write throttles still run, but with rates that one bench
+            # user cannot reach.
+            with override_settings(CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+            }, REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                'DEFAULT_THROTTLE_RATES': dict.fromkeys(
+                    settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], '1000000/s'
+                ),
+            }):
+                started = time.perf_counter()
+                fixtures = self.seed(options)
+                self.stdout.write(
+                    f"Seeded {options['users']} users, {options['quizzes']} quizzes and "
+                    f"{options['quizzes'] * options['attempts']} attempts "
+                    f"in {time.perf_counter() - started:.1f}s."
+                )
+
+                results = []
+                for name, method, make_request in self.get_endpoints(fixtures):
+                    if options['endpoints'] and name not in options['endpoints']:
+                        continue
+                    results.append(
+                        (name, *self.measure(name, method, make_request, options['requests']))
+                    )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.report(results)
+
+        failures = self.check_budgets(results)
+        if failures:
+            raise CommandError("Budgets exceeded:\n" + "\n".join(failures))
+
+    def seed(self, options):
+        rng = random.Random(0)
+        current_time = timezone.now()
+        password = make_password(BENCH_PASSWORD)
+
+        users = User.objects.bulk_create(
+            [
+                User(username=f"bench{number}", password=password,
+                     is_staff=number == 0, is_superuser=number == 0)
+                for number in range(options['users'] + options['requests'] + 1)
+            ],
+            batch_size=1000
+        )
+        creator, submitters = users[0], users[options['users']:]
+        usernames = {user.pk: user.username for user in users}
+
+        quizzes = Quiz.objects.bulk_create([
+            Quiz(
+                creator=creator,
+                title=f"Bench quiz {number}",
+                start_time=current_time - timezone.timedelta(hours=1),
+                end_time=current_time + timezone.timedelta(days=1)
+            )
+            for number in range(options['quizzes'])
+        ])
+        questions = Question.objects.bulk_create(
+            [
+                Question(quiz=quiz, text=f"Question {number}?")
+                for quiz in quizzes
+                for number in range(options['questions'])
+            ],
+            batch_size=1000
+        )
+        choices = Choice.objects.bulk_create(
+            [
+                Choice(question=question, text=f"Choice {number}", is_correct=not number)
+                for question in questions
+                for number in range(options['choices'])
+            ],
+            batch_size=1000
+        )
+
+        choices_by_question = {}
+        for choice in choices:
+            choices_by_question.setdefault(choice.question_id, []).append(choice)
+        questions_by_quiz = {}
+        for question in questions:
+            questions_by_quiz.setdefault(question.quiz_id, []).append(question)
+
+        attempts = QuizAttempt.objects.bulk_create(
+            [
+                QuizAttempt(user=user, quiz=quiz, end_time=current_time)
+                for quiz in quizzes
+                for user in users[:options['attempts']]
+            ],
+            batch_size=1000
+        )
+
+        answers, tallies = [], {}
+        for attempt in attempts:
+            attempt.score = 0
+            for question in questions_by_quiz[attempt.quiz_id]:
+                choice = rng.choice(choices_by_question[question.pk])
+                points = POINTS_PER_QUESTION if choice.is_correct else 0
+                attempt.score += points
+                answers.append(AttemptedAnswers(
+                    attempt=attempt,
+                    question=question,
+                    selected_choice=choice,
+                    is_correct=choice.is_correct,
+                    points_awarded=points
+                ))
+                key = (attempt.quiz_id, choice.pk)
+                tallies[key] = tallies.get(key, 0) + 1
+
+        AttemptedAnswers.objects.bulk_create(answers, batch_size=5000)
+        QuizAttempt.objects.bulk_update(attempts, ['score'], batch_size=1000)
+        LeaderboardEntry.objects.bulk_create(
+            [
+                LeaderboardEntry(attempt=attempt, quiz_id=attempt.quiz_id,
+                                 user_id=attempt.user_id, username=usernames[attempt.user_id],
+                                 score=attempt.score)
+                for attempt in attempts
+            ],
+            batch_size=1000
+        )
+        ChoiceTally.objects.bulk_create(
+            [
+                ChoiceTally(quiz_id=quiz_id, choice_id=choice_id, shard=0, count=count)
+                for (quiz_id, choice_id), count in tallies.items()
+            ],
+            batch_size=1000
+        )
+
+        return {
+            'creator': creator,
+            'submitters': submitters,
+            'quizzes': quizzes,
+            'questions': questions_by_quiz,
+            'choices': choices_by_question,
+            'attempts': [attempt for attempt in attempts if attempt.user_id == creator.pk],
+        }
+
+    def get_endpoints(self, fixtures):
+        """
+        Return ``(name, method, make_request)`` for every endpoint, where
+        ``make_request(client, number)`` sends the ``number``-th request.
+        Endpoints that create data are listed before the ones that delete it.
+        """
+        quizzes = fixtures['quizzes']
+        attempts = fixtures['attempts']
+        creator = fixtures['creator']
+        token = f"Bearer {AccessToken.for_user(creator)}"
+        refresh = str(RefreshToken.for_user(creator))
+        submitted = []
+
+        def quiz(number):
+            return quizzes[number % len(quizzes)]
+
+        def attempt(number):
+            return attempts[number % len(attempts)]
+
+        def answers(quiz_id, number):
+            return [
+                {
+                    "question": question.pk,
+                    "selected_choice": fixtures['choices'][question.pk][number % 2].pk
+                }
+                for question in fixtures['questions'][quiz_id]
+            ]
+
+        def get(name, **kwargs):
+            def make_request(client, number):
+                url = reverse(name, kwargs={key: value(number) for key, value in kwargs.items()})
+                return client.get(url, headers={'Authorization': token})
+            return make_request
+
+        def export(client, number):
+            url = reverse('quiz-attempt-list', kwargs={'quiz_id': quiz(number).pk})
+            return client.get(url, {'format': 'csv'}, headers={'Authorization': token})
+
+        def create_quiz(client, number):
+            return client.post(
+                reverse('quiz-create'),
+                {
+                    "title": f"Created {number}",
+                    "start_time": timezone.now().isoformat(),
+                    "end_time": (timezone.now() + timezone.timedelta(hours=1)).isoformat(),
+                    "questions": [
+                        {
+                            "text": f"Question {index}?",
+                            "choices": [
+                                {"text": "Right", "is_correct": True},
+                                {"text": "Wrong", "is_correct": False},
+                            ]
+                        }
+                        for index in range(len(fixtures['questions'][quizzes[0].pk]))
+                    ]
+                },
+                content_type='application/json',
+                headers={'Authorization': token}
+            )
+
+        def submit_attempt(client, number):
+            submitter = fixtures['submitters'][number]
+            response = client.post(
+                reverse('quiz-attempt-create'),
+                {"quiz": quizzes[0].pk, "answers": answers(quizzes[0].pk, number)},
+                content_type='application/json',
+                headers={'Authorization': f"Bearer {AccessToken.for_user(submitter)}"}
+            )
+            submitted.append((submitter, response.json().get('quiz_attempt_id')))
+            return response
+
+        def update_attempt(client, number):
+            url = reverse('quiz-attempt-crud', kwargs={'attempt_id': attempt(number).pk})
+            return client.put(
+                url,
+                {"answers": answers(attempt(number).quiz_id, number)},
+                content_type='application/json',
+                headers={'Authorization': token}
+            )
+
+        def delete_attempt(client, number):
+            if number >= len(submitted):
+                raise CommandError("quiz-attempt-crud.delete deletes the attempts "
+                                   "created by quiz-attempt-create, run both.")
+            submitter, attempt_id = submitted[number]
+            url = reverse('quiz-attempt-crud', kwargs={'attempt_id': attempt_id})
+            return client.delete(
+                url, headers={'Authorization': f"Bearer {AccessToken.for_user(submitter)}"}
+            )
+
+        def graphql(client, number):
+            return client.post('/graphql/', {"query": GRAPHQL_QUERY},
+                               content_type='application/json')
+
+        def obtain_token(client, number):
+            return client.post(reverse('token_obtain_pair'),
+                               {"username": creator.username, "password": BENCH_PASSWORD})
+
+        def refresh_token(client, number):
+            return client.post(reverse('token_refresh'), {"refresh": refresh})
+
+        def verify_token(client, number):
+            return client.post(reverse('token_verify'), {"token": token.split()[1]})
+
+        def admin_changelist(name):
+            def make_request(client, number):
+                if number == 0:
+                    client.force_login(creator)
+                return client.get(reverse(name))
+            return make_request
+
+        def admin_attempt_change(client, number):
+            if number == 0:
+                client.force_login(creator)
+            return client.get(
+                reverse('admin:quiz_app_quizattempt_change', args=[attempt(number).pk])
+            )
+
+        quiz_id = lambda number: quiz(number).pk
+        attempt_id = lambda number: attempt(number).pk
+
+        return [
+            ('quiz-detail', 'GET', get('quiz-detail', pk=quiz_id)),
+            ('async-quiz-detail', 'GET', get('async-quiz-detail', pk=quiz_id)),
+            ('quiz-active-list', 'GET', get('quiz-active-list')),
+            ('quiz-attempt-list', 'GET', get('quiz-attempt-list', quiz_id=quiz_id)),
+            ('quiz-attempt-list.csv', 'GET', export),
+            ('quiz-leaderboard', 'GET', get('quiz-leaderboard', quiz_id=quiz_id)),
+            ('async-quiz-leaderboard', 'GET', get('async-quiz-leaderboard', quiz_id=quiz_id)),
+            ('quiz-leaderboard-me', 'GET', get('quiz-leaderboard-me', quiz_id=quiz_id)),
+            ('quiz-attempt-crud', 'GET', get('quiz-attempt-crud', attempt_id=attempt_id)),
+            ('async-quiz-attempt', 'GET', get('async-quiz-attempt', attempt_id=attempt_id)),
+            ('quiz-attempt-status', 'GET', get('quiz-attempt-status', attempt_id=attempt_id)),
+            ('quiz-analytics', 'GET', get('quiz-analytics', quiz_id=quiz_id)),
+            ('quiz-live', 'GET', get('quiz-live', quiz_id=quiz_id)),
+            ('quiz-create', 'POST', create_quiz),
+            ('quiz-attempt-create', 'POST', submit_attempt),
+            ('quiz-attempt-crud.put', 'PUT', update_attempt),
+            ('quiz-attempt-crud.delete', 'DELETE', delete_attempt),
+            ('graphql', 'POST', graphql),
+            ('token_obtain_pair', 'POST', obtain_token),
+            ('token_refresh', 'POST', refresh_token),
+            ('token_verify', 'POST', verify_token),
+            ('admin-quiz-changelist', 'GET', admin_changelist('admin:quiz_app_quiz_changelist')),
+            ('admin-attempt-changelist', 'GET',
+             admin_changelist('admin:quiz_app_quizattempt_changelist')),
+            ('admin-answer-changelist', 'GET',
+             admin_changelist('admin:quiz_app_attemptedanswers_changelist')),
+            ('admin-attempt-change', 'GET', admin_attempt_change),
+        ]
+
+    def measure(self, name, method, make_request, requests):
+        """
+        Send ``requests + 1`` requests. The first one warms up the caches and
+        is traced for peak memory; the others are timed and their queries
+        counted. Event streams are read up to their first event only.
+        """
+        client = Client()
+        timings, query_counts = [], []
+
+        tracemalloc.start()
+        try:
+            self.send(name, client, make_request, 0)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        for number in range(1, requests + 1):
+            with ExitStack() as stack:
+                queries = [
+                    stack.enter_context(CaptureQueriesContext(connections[alias]))
+                    for alias in connections
+                ]
+                started = time.perf_counter()
+                self.send(name, client, make_request, number)
+                timings.append(time.perf_counter() - started)
+            query_counts.append(sum(len(captured) for captured in queries))
+
+        return method, sorted(timings), max(query_counts), peak_memory
+
+    @staticmethod
+    def send(name, client, make_request, number):
+        response = make_request(client, number)
+
+        if response.status_code >= 400:
+            raise CommandError(f"{name} failed with status {response.status_code}.")
+
+        if response.streaming:
+            if response['Content-Type'].startswith('text/event-stream'):
+                next(iter(response.streaming_content), None)
+            else:
+                b''.join(response.streaming_content)
+        response.close()
+
+    @staticmethod
+    def percentile(timings, fraction):
+        return timings[min(len(timings) - 1, int(len(timings) * fraction))] * 1000
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<28} {'method':<7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>8} {'peak KiB':>9}"
+        )
+        for name, method, timings, queries, peak_memory in results:
+            self.stdout.write(
+                f"{name:<28} {method:<7} {self.percentile(timings, 0.5):8.2f} "
+                f"{self.percentile(timings, 0.95):8.2f} {self.percentile(timings, 0.99):8.2f} "
+                f"{queries:>8} {peak_memory / 1024:9.1f}"
+            )
+
+    def check_budgets(self, results):
+        failures = []
+
+        for name, _, timings, queries, _ in results:
+            budget = settings.QUIZ_BENCH_BUDGETS.get(name, {})
+
+            if 'p95_ms' in budget and self.percentile(timings, 0.95) > budget['p95_ms']:
+                failures.append(
+                    f"{name}: p95 {self.percentile(timings, 0.95):.2f}ms > {budget['p95_ms']}ms"
+                )
+            if 'queries' in budget and queries > budget['queries']:
+                failures.append(f"{name}: {queries} queries > {budget['queries']}")
+
+        return failures
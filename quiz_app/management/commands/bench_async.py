@@ -0,0 +1,134 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from quiz_app.models import Quiz, QuizAttempt
+
+
+ENDPOINTS = {
+    'detail': ('quiz-detail', 'async-quiz-detail'),
+    'leaderboard': ('quiz-leaderboard', 'async-quiz-leaderboard'),
+    'attempt': ('quiz-attempt-crud', 'async-quiz-attempt'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent-request throughput of the WSGI (sync views, "
+        "thread pool) and ASGI (async views, one event loop) request paths "
+        "against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True,
+                            help="Username the requests are authenticated as.")
+        parser.add_argument('--quiz', type=int,
+                            help="Quiz ID (default: the user's latest attempted quiz).")
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='detail')
+        parser.add_argument('--requests', type=int, default=500,
+                            help="Requests per path (default: 500).")
+        parser.add_argument('--concurrency', type=int, default=20,
+                            help="Requests in flight at once (default: 20).")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--requests and --concurrency must be at least 1.")
+
+        sync_url, async_url = self.get_urls(user, options['endpoint'], options['quiz'])
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        total, concurrency = options['requests'], options['concurrency']
+
+        self.report('WSGI', sync_url, *self.run_sync(sync_url, headers, total, concurrency))
+        self.report('ASGI', async_url, *asyncio.run(
+            self.run_async(async_url, headers, total, concurrency)
+        ))
+
+    def get_urls(self, user, endpoint, quiz_id):
+        sync_name, async_name = ENDPOINTS[endpoint]
+        attempts = QuizAttempt.objects.filter(user=user)
+        if quiz_id is not None:
+            attempts = attempts.filter(quiz_id=quiz_id)
+        attempt = attempts.order_by('-id').first()
+
+        if endpoint == 'attempt':
+            if attempt is None:
+                raise CommandError("The user has no attempt to retrieve.")
+            kwargs = {'attempt_id': attempt.id}
+        else:
+            if quiz_id is None:
+                if attempt is None:
+                    raise CommandError("--quiz is required when the user has no attempts.")
+                quiz_id = attempt.quiz_id
+            if not Quiz.objects.filter(id=quiz_id).exists():
+                raise CommandError(f"Quiz {quiz_id} does not exist.")
+            kwargs = {'pk': quiz_id} if endpoint == 'detail' else {'quiz_id': quiz_id}
+
+        return reverse(sync_name, kwargs=kwargs), reverse(async_name, kwargs=kwargs)
+
+    def run_sync(self, url, headers, total, concurrency):
+        def worker(count):
+            client = Client()
+            timings = []
+            for _ in range(count):
+                started = time.perf_counter()
+                response = client.get(url, headers=headers)
+                timings.append(time.perf_counter() - started)
+                self.check_response(response)
+            return timings
+
+        counts = self.split(total, concurrency)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = [t for result in pool.map(worker, counts) for t in result]
+
+        return time.perf_counter() - started, timings
+
+    async def run_async(self, url, headers, total, concurrency):
+        async def worker(count):
+            client = AsyncClient()
+            timings = []
+            for _ in range(count):
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                timings.append(time.perf_counter() - started)
+                self.check_response(response)
+            return timings
+
+        counts = self.split(total, concurrency)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(worker(count) for count in counts))
+
+        return time.perf_counter() - started, [t for result in results for t in result]
+
+    @staticmethod
+    def split(total, concurrency):
+        return [
+            total // concurrency + (1 if i < total % concurrency else 0)
+            for i in range(min(total, concurrency))
+        ]
+
+    @staticmethod
+    def check_response(response):
+        if response.status_code != 200:
+            raise CommandError(f"Request failed with status {response.status_code}.")
+
+    def report(self, label, url, elapsed, timings):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{label} {url}: {len(timings)} requests in {elapsed:.2f}s "
+            f"({len(timings) / elapsed:.1f} req/s), "
+            f"p50 {statistics.median(timings) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms"
+        )
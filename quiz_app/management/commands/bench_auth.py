@@ -0,0 +1,52 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from quiz_app.authentication import CachedJWTAuthentication
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare queries and time per authenticated request between "
+        "simplejwt's JWTAuthentication and CachedJWTAuthentication."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True,
+                            help="Username the token is issued for.")
+        parser.add_argument('--requests', type=int, default=1000,
+                            help="Requests authenticated per class (default: 1000).")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        if options['requests'] < 1:
+            raise CommandError("--requests must be at least 1.")
+
+        request = RequestFactory().get(
+            '/', headers={'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        )
+
+        for authentication in (JWTAuthentication(), CachedJWTAuthentication()):
+            authentication.authenticate(request)
+
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for _ in range(options['requests']):
+                    authentication.authenticate(request)
+                elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{type(authentication).__name__}: "
+                f"{len(queries) / options['requests']:.2f} queries/request, "
+                f"{elapsed / options['requests'] * 1000:.3f}ms/request"
+            )
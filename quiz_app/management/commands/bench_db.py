@@ -0,0 +1,82 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the database time of a request cycle with a new connection "
+        "per request against the configured persistent or pooled connections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help="Database alias to measure (default: default).")
+        parser.add_argument('--requests', type=int, default=500,
+                            help="Request cycles measured per mode (default: 500).")
+
+    def handle(self, *args, **options):
+        if options['database'] not in connections:
+            raise CommandError(f"Database '{options['database']}' is not configured.")
+
+        if options['requests'] < 1:
+            raise CommandError("--requests must be at least 1.")
+
+        connection = connections[options['database']]
+        settings_dict = connection.settings_dict
+        pool = settings_dict['OPTIONS'].get('pool')
+
+        self.stdout.write(
+            f"{connection.alias} ({connection.vendor}): "
+            f"CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}, "
+            f"CONN_HEALTH_CHECKS={settings_dict['CONN_HEALTH_CHECKS']}, "
+            f"pool={bool(pool)}"
+        )
+
+        unpooled = connection.__class__(
+            {
+                **settings_dict,
+                'CONN_MAX_AGE': 0,
+                'OPTIONS': {
+                    key: value for key, value in settings_dict['OPTIONS'].items()
+                    if key != 'pool'
+                },
+            },
+            connection.alias
+        )
+        self.report("new connection per request",
+                    self.measure(unpooled, options['requests'], reuse=False))
+
+        connection.close()
+        self.report("pooled" if pool else "persistent",
+                    self.measure(connection, options['requests'], reuse=True))
+
+    def measure(self, connection, requests, reuse):
+        timings = []
+
+        for _ in range(requests):
+            started = time.perf_counter()
+            request_started.send(sender=self.__class__)
+
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+
+            request_finished.send(sender=self.__class__)
+            if not reuse:
+                connection.close()
+            timings.append(time.perf_counter() - started)
+
+        return timings
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{label}: {len(timings)} requests, "
+            f"mean {statistics.fmean(timings) * 1000:.3f}ms, "
+            f"p50 {statistics.median(timings) * 1000:.3f}ms, p95 {p95 * 1000:.3f}ms"
+        )
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from quiz_app.grading import grade_pending_attempts
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Grade quiz attempts submitted for write-behind grading with a pool "
+        "of worker threads that claim pending attempts in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help="Number of worker threads (default: 4).")
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.QUIZ_GRADING_BATCH_SIZE,
+                            help="Attempts claimed per transaction.")
+        parser.add_argument('--poll-interval', type=float,
+                            default=settings.QUIZ_GRADING_POLL_INTERVAL,
+                            help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once the queue is drained instead of polling.")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--workers and --batch-size must be at least 1.")
+
+        self.stop = threading.Event()
+        self.graded = 0
+        self.lock = threading.Lock()
+        started = time.perf_counter()
+
+        workers = [
+            threading.Thread(
+                target=self.work,
+                args=(options['batch_size'], options['poll_interval'], options['once']),
+                name=f"grader-{number}",
+                daemon=True
+            )
+            for number in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(timeout=1)
+        except KeyboardInterrupt:
+            self.stop.set()
+            for worker in workers:
+                worker.join()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Graded {self.graded} attempts in {elapsed:.2f}s "
+            f"with {options['workers']} workers."
+        ))
+
+    def work(self, batch_size, poll_interval, once):
+        try:
+            while not self.stop.is_set():
+                try:
+                    processed = grade_pending_attempts(batch_size)
+                except DatabaseError:
+                    logger.warning("Grading batch failed, retrying.", exc_info=True)
+                    connection.close()
+                    self.stop.wait(poll_interval)
+                    continue
+
+                with self.lock:
+                    self.graded += processed
+
+                if not processed:
+                    if once:
+                        return
+                    self.stop.wait(poll_interval)
+        finally:
+            connection.close()
@@ -0,0 +1 @@
+from graphene_django.management.commands.graphql_schema import Command  # noqa: F401
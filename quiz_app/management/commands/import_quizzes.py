@@ -0,0 +1,83 @@
+import json
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from quiz_app.authoring import create_quizzes
+from quiz_app.serializers import QuizCreateSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a JSONL quiz bank (one quiz per line, in the quiz creation "
+        "payload format) in fixed-size transactional batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSONL file to import, or '-' for stdin.")
+        parser.add_argument('--creator', required=True,
+                            help="Username that will own the imported quizzes.")
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help="Quizzes inserted per transaction (default: 100).")
+
+    def handle(self, *args, **options):
+        try:
+            creator = User.objects.get(username=options['creator'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['creator']}' does not exist.")
+
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        if options['path'] == '-':
+            self.import_lines(sys.stdin, creator, options['batch_size'])
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                self.import_lines(lines, creator, options['batch_size'])
+
+    def import_lines(self, lines, creator, batch_size):
+        batch = []
+        imported = skipped = 0
+
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+
+            quiz_data = self.validate_line(line_number, line)
+            if quiz_data is None:
+                skipped += 1
+                continue
+
+            batch.append(quiz_data)
+            if len(batch) == batch_size:
+                imported += self.flush(creator, batch)
+                self.stdout.write(f"Imported {imported} quizzes ({line_number} lines read).")
+                batch = []
+
+        if batch:
+            imported += self.flush(creator, batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: imported {imported} quizzes, skipped {skipped} invalid lines."
+        ))
+
+    def validate_line(self, line_number, line):
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            self.stderr.write(f"Line {line_number}: invalid JSON ({e}).")
+            return None
+
+        serializer = QuizCreateSerializer(data=data)
+        if not serializer.is_valid():
+            self.stderr.write(f"Line {line_number}: {serializer.errors}")
+            return None
+
+        return serializer.validated_data
+
+    def flush(self, creator, batch):
+        with transaction.atomic():
+            create_quizzes(creator, batch)
+        return len(batch)
@@ -0,0 +1,124 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+STARTUP_CODE = (
+    "from Quiz.wsgi import application; "
+    "from django.urls import get_resolver; "
+    "get_resolver().url_patterns"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the cold start of a worker (WSGI application and URLconf "
+        "loaded in a fresh interpreter), report the import cost per package "
+        "and per project module, and fail if the median cold start exceeds "
+        "QUIZ_STARTUP_BUDGET_MS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Cold starts timed (default: 5).")
+        parser.add_argument('--top', type=int, default=15,
+                            help="Packages and project modules listed (default: 15).")
+        parser.add_argument('--budget', type=float, default=settings.QUIZ_STARTUP_BUDGET_MS,
+                            help="Cold start budget in milliseconds "
+                                 f"(default: {settings.QUIZ_STARTUP_BUDGET_MS}).")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+
+        timings = [self.start() for _ in range(options['repeat'])]
+        imports = self.parse_importtime(self.start('-X', 'importtime'))
+
+        packages = Counter()
+        for name, self_time, _ in imports:
+            packages[name.split('.')[0]] += self_time
+
+        project = self.project_packages()
+        modules = sorted(
+            ((name, cumulative) for name, _, cumulative in imports
+             if name.split('.')[0] in project),
+            key=lambda module: module[1],
+            reverse=True
+        )
+
+        self.stdout.write(f"Import time by package (self, {len(imports)} modules):")
+        for name, self_time in packages.most_common(options['top']):
+            self.stdout.write(f"  {name:<32} {self_time / 1000:8.1f}ms")
+
+        self.stdout.write("Slowest project modules (cumulative):")
+        for name, cumulative in modules[:options['top']]:
+            self.stdout.write(f"  {name:<32} {cumulative / 1000:8.1f}ms")
+
+        median = statistics.median(timings)
+        self.stdout.write(
+            f"Cold start: median {median:.1f}ms, best {min(timings):.1f}ms "
+            f"over {len(timings)} runs (budget {options['budget']:.0f}ms)"
+        )
+
+        if median > options['budget']:
+            raise CommandError(
+                f"Cold start of {median:.1f}ms exceeds the budget of {options['budget']:.0f}ms."
+            )
+
+    @staticmethod
+    def start(*flags):
+        """
+        Start a fresh interpreter that loads the project like a worker does
+        and return its stderr with flags, or its wall time in milliseconds.
+        """
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        env.pop('QUIZ_WARM_UP', None)
+
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, *flags, '-c', STARTUP_CODE],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+
+        if result.returncode:
+            raise CommandError(f"Starting the project failed:\n{result.stderr}")
+
+        return result.stderr if flags else elapsed
+
+    @staticmethod
+    def parse_importtime(output):
+        imports = []
+
+        for line in output.splitlines():
+            if not line.startswith('import time:'):
+                continue
+
+            self_time, cumulative, name = line[len('import time:'):].split('|')
+            if not self_time.strip().isdigit():
+                continue
+
+            imports.append((name.strip(), int(self_time), int(cumulative)))
+
+        return imports
+
+    @staticmethod
+    def project_packages():
+        packages = {settings.ROOT_URLCONF.split('.')[0]}
+
+        for config in apps.get_app_configs():
+            if Path(config.path).is_relative_to(settings.BASE_DIR):
+                packages.add(config.name.split('.')[0])
+
+        return packages
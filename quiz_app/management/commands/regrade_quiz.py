@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz_app.grading import regrade_quiz
+from quiz_app.models import Quiz
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute answer points and attempt scores of the given quizzes "
+        "against their current answer keys."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='+', type=int, metavar='quiz_id')
+        parser.add_argument('--chunk-size', type=int,
+                            default=settings.QUIZ_REGRADE_CHUNK_SIZE,
+                            help="Attempt ids updated per transaction.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        quizzes = Quiz.objects.in_bulk(options['quiz_ids'])
+        missing = sorted(set(options['quiz_ids']) - set(quizzes))
+        if missing:
+            raise CommandError(f"Quizzes not found: {', '.join(map(str, missing))}.")
+
+        for quiz in quizzes.values():
+            started = time.perf_counter()
+            regraded = regrade_quiz(quiz, options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Regraded {regraded} attempts of quiz {quiz.pk} "
+                f"in {time.perf_counter() - started:.2f}s."
+            ))
@@ -0,0 +1,365 @@
+import http.client
+import json
+import queue
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+
+VARIABLE = re.compile(r"\{(\w+)\}")
+
+
+def render(template, variables):
+    """
+    Fill ``{name}`` placeholders in a JSON-like template. A string that is a
+    single placeholder is replaced by the variable itself, keeping its type.
+    """
+    if isinstance(template, str):
+        match = VARIABLE.fullmatch(template)
+        if match:
+            return variables[match.group(1)]
+        return template.format_map(variables)
+
+    if isinstance(template, list):
+        return [render(value, variables) for value in template]
+
+    if isinstance(template, dict):
+        return {key: render(value, variables) for key, value in template.items()}
+
+    return template
+
+
+class Connection:
+    """Keep-alive HTTP connection of one virtual user."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body=None, headers=None):
+        if self.connection is None:
+            self.connection = self.connection_class(self.host, self.port, timeout=self.timeout)
+
+        headers = {'Accept': 'application/json', **(headers or {})}
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            raise
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = {}
+        self.errors = {}
+        self.aborted = 0
+
+    def record(self, name, elapsed, ok):
+        with self.lock:
+            self.timings.setdefault(name, []).append(elapsed)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def abort(self):
+        with self.lock:
+            self.aborted += 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a scripted scenario (JSON) or recorded traffic (JSONL) against "
+        "a running server and report throughput, latency percentiles and error "
+        "rates per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario',
+                            help="Scenario JSON file, or JSONL of recorded requests with --recorded.")
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000',
+                            help="Server to send the traffic to (default: http://127.0.0.1:8000).")
+        parser.add_argument('--users', type=int,
+                            help="Virtual users, overriding the scenario's 'users'.")
+        parser.add_argument('--ramp', type=float,
+                            help="Seconds over which the virtual users start, overriding "
+                                 "the scenario's 'ramp'.")
+        parser.add_argument('--recorded', action='store_true',
+                            help="Replay recorded requests at their 'at' offsets instead of "
+                                 "running a scripted scenario.")
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help="Connections used to replay recorded requests (default: 50).")
+        parser.add_argument('--speed', type=float, default=1.0,
+                            help="Replay speed of recorded requests (default: 1.0).")
+        parser.add_argument('--password',
+                            help="Password of the users in recorded requests.")
+        parser.add_argument('--create-users', action='store_true',
+                            help="Create the scenario's users that do not exist yet.")
+        parser.add_argument('--timeout', type=float, default=30,
+                            help="Per-request timeout in seconds (default: 30).")
+
+    def handle(self, *args, **options):
+        self.base_url = options['base_url']
+        self.timeout = options['timeout']
+        self.recorder = Recorder()
+
+        if options['recorded']:
+            run = self.prepare_recorded(options)
+        else:
+            run = self.prepare_scripted(options)
+
+        started = time.perf_counter()
+        run()
+        self.report(time.perf_counter() - started)
+
+    def prepare_scripted(self, options):
+        try:
+            with open(options['scenario'], encoding='utf-8') as scenario_file:
+                scenario = json.load(scenario_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read scenario: {e}")
+
+        if not all('path' in step for step in scenario.get('steps', [])):
+            raise CommandError("The scenario needs 'steps', each with a 'path'.")
+
+        users = options['users'] or scenario.get('users', 1)
+        ramp = options['ramp'] if options['ramp'] is not None else scenario.get('ramp', 0)
+
+        if users < 1:
+            raise CommandError("--users must be at least 1.")
+
+        variables = [
+            render(scenario.get('variables', {}), {'n': number}) | {'n': number}
+            for number in range(users)
+        ]
+
+        if options['create_users']:
+            self.create_users({
+                user_variables['username']: user_variables['password']
+                for user_variables in variables
+            })
+
+        def run():
+            start = time.monotonic()
+            threads = [
+                threading.Thread(
+                    target=self.run_user,
+                    args=(scenario['steps'], user_variables, start + ramp * number / users)
+                )
+                for number, user_variables in enumerate(variables)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        return run
+
+    def run_user(self, steps, variables, start_at):
+        time.sleep(max(0, start_at - time.monotonic()))
+        connection = Connection(self.base_url, self.timeout)
+        rng = random.Random(variables['n'])
+
+        for step in steps:
+            for _ in range(step.get('repeat', 1)):
+                if not self.run_step(connection, step, variables, rng) and (
+                    step.get('save') or step.get('answers')
+                ):
+                    self.recorder.abort()
+                    return
+                time.sleep(step.get('think', 0))
+
+    def run_step(self, connection, step, variables, rng):
+        """
+        Send one request of ``step`` and save what later steps need from its
+        response: ``save`` maps variables to response keys, and ``answers``
+        picks a random choice per question of a quiz detail response.
+        """
+        headers = render(step.get('headers', {}), variables)
+        if 'token' in variables:
+            headers.setdefault('Authorization', f"Bearer {variables['token']}")
+
+        ok, content = self.send(
+            connection,
+            step.get('name', step['path']),
+            step.get('method', 'GET'),
+            render(step['path'], variables),
+            render(step['json'], variables) if 'json' in step else None,
+            headers,
+            step.get('expect')
+        )
+
+        if not ok or not (step.get('save') or step.get('answers')):
+            return ok
+
+        try:
+            data = json.loads(content)
+            for variable, key in step.get('save', {}).items():
+                variables[variable] = data[key]
+            if step.get('answers'):
+                variables['answers'] = [
+                    {
+                        "question": question['id'],
+                        "selected_choice": rng.choice(question['choices'])['id']
+                    }
+                    for question in data['questions']
+                ]
+        except (ValueError, KeyError, IndexError, TypeError):
+            return False
+
+        return True
+
+    def send(self, connection, name, method, path, body, headers, expect=None):
+        started = time.perf_counter()
+        try:
+            status, content = connection.request(method, path, body, headers)
+        except (OSError, http.client.HTTPException):
+            status, content = None, b''
+        elapsed = time.perf_counter() - started
+
+        if expect:
+            ok = status in expect
+        else:
+            ok = status is not None and 200 <= status < 400
+
+        self.recorder.record(name, elapsed, ok)
+        return ok, content
+
+    def prepare_recorded(self, options):
+        try:
+            with open(options['scenario'], encoding='utf-8') as recording:
+                requests = sorted(
+                    (json.loads(line) for line in recording if line.strip()),
+                    key=lambda request: request.get('at', 0)
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read recorded requests: {e}")
+
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+
+        if options['speed'] <= 0:
+            raise CommandError("--speed must be positive.")
+
+        usernames = {request['user'] for request in requests if request.get('user')}
+        if usernames and not options['password']:
+            raise CommandError("--password is required to replay requests of users.")
+
+        if options['create_users']:
+            self.create_users(dict.fromkeys(usernames, options['password']))
+
+        tokens = {}
+        tokens_lock = threading.Lock()
+
+        def get_token(connection, username):
+            with tokens_lock:
+                if username in tokens:
+                    return tokens[username]
+
+            ok, content = self.send(
+                connection, 'token', 'POST', '/auth/token/',
+                {"username": username, "password": options['password']}, {}
+            )
+
+            with tokens_lock:
+                return tokens.setdefault(username, json.loads(content)['access'] if ok else None)
+
+        pending = queue.Queue()
+        for request in requests:
+            pending.put(request)
+
+        def worker(start):
+            connection = Connection(self.base_url, self.timeout)
+
+            while True:
+                try:
+                    request = pending.get_nowait()
+                except queue.Empty:
+                    return
+
+                time.sleep(max(0, start + request.get('at', 0) / options['speed'] - time.monotonic()))
+                headers = {}
+                if request.get('user'):
+                    token = get_token(connection, request['user'])
+                    if token is None:
+                        self.recorder.record(request.get('name', request['path']), 0, False)
+                        continue
+                    headers['Authorization'] = f"Bearer {token}"
+
+                self.send(connection, request.get('name', request['path']),
+                          request.get('method', 'GET'), request['path'],
+                          request.get('json'), headers, request.get('expect'))
+
+        def run():
+            start = time.monotonic()
+            threads = [
+                threading.Thread(target=worker, args=(start,))
+                for _ in range(min(options['concurrency'], len(requests)))
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        return run
+
+    def create_users(self, passwords):
+        existing = set(
+            User.objects.filter(username__in=passwords).values_list('username', flat=True)
+        )
+        hashes = {}
+        User.objects.bulk_create(
+            [
+                User(username=username,
+                     password=hashes.setdefault(password, make_password(password)))
+                for username, password in passwords.items()
+                if username not in existing
+            ],
+            batch_size=1000
+        )
+
+    @staticmethod
+    def percentile(timings, fraction):
+        return timings[min(len(timings) - 1, int(len(timings) * fraction))] * 1000
+
+    def report(self, elapsed):
+        recorder = self.recorder
+        total = sum(len(timings) for timings in recorder.timings.values())
+        errors = sum(recorder.errors.values())
+
+        self.stdout.write(
+            f"{total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s), "
+            f"{errors} errors, {recorder.aborted} virtual users aborted"
+        )
+        self.stdout.write(
+            f"{'endpoint':<28} {'requests':>8} {'req/s':>8} {'errors':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        for name, timings in recorder.timings.items():
+            timings = sorted(timings)
+            self.stdout.write(
+                f"{name:<28} {len(timings):>8} {len(timings) / elapsed:8.1f} "
+                f"{recorder.errors.get(name, 0) / len(timings):7.1%} "
+                f"{self.percentile(timings, 0.5):8.1f} {self.percentile(timings, 0.95):8.1f} "
+                f"{self.percentile(timings, 0.99):8.1f} {timings[-1] * 1000:8.1f}"
+            )
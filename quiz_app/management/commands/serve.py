@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+from gunicorn.app.base import BaseApplication
+
+from quiz_app.warmup import open_pools, release_connections, warm_up
+
+
+class QuizServer(BaseApplication):
+    """
+    Gunicorn application serving ``Quiz/wsgi.py`` or ``Quiz/asgi.py``.
+
+    The Django application is loaded once in the master, together with the
+    caches filled by ``warm_up()`` when QUIZ_SERVE_WARM_UP is set, so the
+    forked workers share that memory copy-on-write. Database connections
+    and pools are closed before forking, and every worker opens its own
+    pools.
+    """
+
+    def __init__(self, application_path, options):
+        self.application_path = application_path
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        application = import_string(self.application_path)
+
+        if settings.QUIZ_SERVE_WARM_UP:
+            warm_up()
+        release_connections()
+
+        return application
+
+
+def post_fork(server, worker):
+    if settings.QUIZ_SERVE_WARM_UP:
+        open_pools()
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the project with gunicorn: the application is preloaded in "
+        "the master and served by QUIZ_SERVE_WORKERS forked workers. Send "
+        "HUP to the master to gracefully replace the workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asgi', action='store_true',
+                            help="Serve Quiz/asgi.py with uvicorn workers instead of Quiz/wsgi.py.")
+        parser.add_argument('--bind', default=settings.QUIZ_SERVE_BIND,
+                            help=f"Address to listen on (default: {settings.QUIZ_SERVE_BIND}).")
+        parser.add_argument('--workers', type=int, default=settings.QUIZ_SERVE_WORKERS,
+                            help=f"Worker processes (default: {settings.QUIZ_SERVE_WORKERS}).")
+        parser.add_argument('--threads', type=int, default=settings.QUIZ_SERVE_THREADS,
+                            help=f"Threads per WSGI worker (default: {settings.QUIZ_SERVE_THREADS}).")
+        parser.add_argument('--pid', help="File the master's process id is written to.")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        if options['threads'] < 1:
+            raise CommandError("--threads must be at least 1.")
+
+        self.check_shared_cache(options['workers'])
+        QuizServer(*self.get_application(options)).run()
+
+    @staticmethod
+    def check_shared_cache(workers):
+        """
+        Refuse to start several workers on a per-process local-memory
+        cache, which every worker would silently keep to itself.
+        """
+        local = [
+            alias for alias, cache_settings in settings.CACHES.items()
+            if cache_settings['BACKEND'].endswith('LocMemCache')
+        ]
+
+        if workers > 1 and local:
+            raise CommandError(
+                f"The {', '.join(local)} cache is local to each process, so "
+                f"{workers} workers would not share it. Set QUIZ_CACHE_URL to a "
+                "Redis URL (e.g. redis://localhost:6379/0) or serve with --workers 1."
+            )
+
+    @staticmethod
+    def get_application(options):
+        server_options = {
+            'bind': options['bind'],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'timeout': settings.QUIZ_SERVE_TIMEOUT,
+            'graceful_timeout': settings.QUIZ_SERVE_GRACEFUL_TIMEOUT,
+            'max_requests': settings.QUIZ_SERVE_MAX_REQUESTS,
+            'max_requests_jitter': settings.QUIZ_SERVE_MAX_REQUESTS // 10,
+            'preload_app': True,
+            'post_fork': post_fork,
+            'pidfile': options['pid'],
+        }
+
+        if options['asgi']:
+            server_options['worker_class'] = 'uvicorn_worker.UvicornWorker'
+            return 'Quiz.asgi.application', server_options
+
+        server_options['worker_class'] = 'gthread' if options['threads'] > 1 else 'sync'
+        return 'Quiz.wsgi.application', server_options
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_leaderboard(apps, schema_editor):
+    QuizAttempt = apps.get_model('quiz_app', 'QuizAttempt')
+    LeaderboardEntry = apps.get_model('quiz_app', 'LeaderboardEntry')
+
+    attempts = (
+        QuizAttempt.objects.values_list('id', 'quiz_id', 'user_id',
+                                        'user__username', 'score')
+        .order_by('id')
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+
+    for attempt_id, quiz_id, user_id, username, score in attempts:
+        batch.append(
+            LeaderboardEntry(attempt_id=attempt_id, quiz_id=quiz_id,
+                             user_id=user_id, username=username, score=score)
+        )
+        if len(batch) == 2000:
+            LeaderboardEntry.objects.bulk_create(batch)
+            batch = []
+
+    LeaderboardEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0003_quiz_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('attempt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_entry', serialize=False, to='quiz_app.quizattempt')),
+                ('username', models.CharField(max_length=150)),
+                ('score', models.FloatField(default=0)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='quiz_app.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Leaderboard Entry',
+                'verbose_name_plural': 'Leaderboard Entries',
+                'ordering': ['-score', 'attempt_id'],
+                'indexes': [models.Index(fields=['quiz', '-score', 'attempt'], name='leaderboard_quiz_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'user'), name='leaderboard_unique_quiz_user')],
+            },
+        ),
+        migrations.RunPython(backfill_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_tallies(apps, schema_editor):
+    AttemptedAnswers = apps.get_model('quiz_app', 'AttemptedAnswers')
+    ChoiceTally = apps.get_model('quiz_app', 'ChoiceTally')
+
+    counts = (
+        AttemptedAnswers.objects.order_by()
+        .values_list('attempt__quiz_id', 'selected_choice_id')
+        .annotate(count=models.Count('id'))
+    )
+    ChoiceTally.objects.bulk_create(
+        (
+            ChoiceTally(quiz_id=quiz_id, choice_id=choice_id, shard=0, count=count)
+            for quiz_id, choice_id, count in counts.iterator()
+        ),
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0006_quizattempt_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChoiceTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('choice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tallies', to='quiz_app.choice')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='choice_tallies', to='quiz_app.quiz')),
+            ],
+            options={
+                'verbose_name': 'Choice Tally',
+                'verbose_name_plural': 'Choice Tallies',
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'shard', 'choice'), name='choice_tally_unique_shard')],
+            },
+        ),
+        migrations.RunPython(backfill_tallies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.3 on 2026-10-18 21:19
+
+from django.db import migrations, models
+
+
+def remove_duplicate_answers(apps, schema_editor):
+    """
+    Keep the latest answer per attempt and question. Earlier ones were left
+    behind when an update raced write-behind grading; their tallies are
+    taken back and the attempt's score is recomputed.
+    """
+    AttemptedAnswers = apps.get_model('quiz_app', 'AttemptedAnswers')
+    ChoiceTally = apps.get_model('quiz_app', 'ChoiceTally')
+    LeaderboardEntry = apps.get_model('quiz_app', 'LeaderboardEntry')
+    QuizAttempt = apps.get_model('quiz_app', 'QuizAttempt')
+
+    duplicated = (
+        AttemptedAnswers.objects.order_by()
+        .values('attempt_id', 'question_id')
+        .annotate(latest=models.Max('id'), answers=models.Count('id'))
+        .filter(answers__gt=1)
+    )
+
+    for group in list(duplicated):
+        duplicates = AttemptedAnswers.objects.filter(
+            attempt_id=group['attempt_id'],
+            question_id=group['question_id']
+        ).exclude(id=group['latest'])
+
+        for quiz_id, choice_id in duplicates.values_list('attempt__quiz_id', 'selected_choice_id'):
+            tally, _ = ChoiceTally.objects.get_or_create(quiz_id=quiz_id, choice_id=choice_id,
+                                                         shard=0)
+            ChoiceTally.objects.filter(pk=tally.pk).update(count=models.F('count') - 1)
+        duplicates.delete()
+
+        score = AttemptedAnswers.objects.filter(attempt_id=group['attempt_id']).aggregate(
+            total=models.Sum('points_awarded')
+        )['total'] or 0
+        QuizAttempt.objects.filter(pk=group['attempt_id']).update(score=score)
+        LeaderboardEntry.objects.filter(attempt_id=group['attempt_id']).update(score=score)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz_app', '0007_choicetally'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attemptedanswers',
+            constraint=models.UniqueConstraint(fields=('attempt', 'question'), name='answer_unique_attempt_question'),
+        ),
+    ]
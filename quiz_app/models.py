@@ -1,7 +1,7 @@
 from datetime import datetime
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models import Sum
+from django.db.models import F, Sum
 from django.utils.timezone import now, make_aware
 
 
@@ -16,24 +16,41 @@ class Quiz(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
         verbose_name = "Quiz"
         verbose_name_plural = "Quizzes"
         ordering = ['start_time']
+        indexes = [
+            models.Index(fields=['start_time'], name='quiz_start_time_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
-    def save(self, *args, **kwargs):
+    def refresh_is_active(self):
         if self.end_time:
             if isinstance(self.end_time, str):
                 self.end_time = datetime.fromisoformat(self.end_time.replace("Z", "+00:00"))
             if self.end_time.tzinfo is None:
                 self.end_time = make_aware(self.end_time)
             self.is_active = self.end_time > now()
+
+    def save(self, *args, **kwargs):
+        self.refresh_is_active()
+
+        bump_version = not self._state.adding
+        if bump_version:
+            self.version = F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+
         super().save(*args, **kwargs)
 
+        if bump_version:
+            self.refresh_from_db(fields=['version'])
+
   
 class Question(models.Model):
     quiz = models.ForeignKey(
@@ -70,6 +87,11 @@ class Choice(models.Model):
 
 
 class QuizAttempt(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        GRADED = 'graded', 'Graded'
+        FAILED = 'failed', 'Failed'
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -84,21 +106,114 @@ class QuizAttempt(models.Model):
     end_time = models.DateTimeField(blank=True, null=True)
     score = models.FloatField(default=0)
     feedback = models.TextField(blank=True, null=True)
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.GRADED
+    )
+    pending_answers = models.JSONField(blank=True, null=True, editable=False)
 
     class Meta:
         unique_together = ('user', 'quiz')
         verbose_name = "Quiz Attempt"
         verbose_name_plural = "Quiz Attempts"
         ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['quiz', '-start_time', '-id'],
+                         name='attempt_quiz_start_idx'),
+            models.Index(fields=['quiz', '-score'],
+                         name='attempt_quiz_score_idx'),
+            models.Index(fields=['id'], name='attempt_pending_idx',
+                         condition=models.Q(status='pending')),
+        ]
     
     def __str__(self):
         return f"Attempt by {self.user.username} for Quiz: {self.quiz.title}"
 
-    def calculate_score(self):
-        total_score = self.answers.aggregate(total=Sum('points_awarded'))['total'] or 0
+    def calculate_score(self, total_score=None):
+        if total_score is None:
+            total_score = self.answers.aggregate(total=Sum('points_awarded'))['total'] or 0
         self.score = total_score
-        self.save()
-        
+        self.save(update_fields=['score'])
+
+        LeaderboardEntry.objects.bulk_create(
+            [
+                LeaderboardEntry(
+                    attempt=self,
+                    quiz_id=self.quiz_id,
+                    user_id=self.user_id,
+                    username=self.user.username,
+                    score=self.score
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=['attempt'],
+            update_fields=['username', 'score']
+        )
+
+
+class LeaderboardEntry(models.Model):
+    attempt = models.OneToOneField(
+        QuizAttempt,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="leaderboard_entry"
+    )
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name="leaderboard_entries"
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="leaderboard_entries"
+    )
+    username = models.CharField(max_length=150)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name = "Leaderboard Entry"
+        verbose_name_plural = "Leaderboard Entries"
+        ordering = ['-score', 'attempt_id']
+        indexes = [
+            models.Index(fields=['quiz', '-score', 'attempt'],
+                         name='leaderboard_quiz_score_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'user'],
+                                    name='leaderboard_unique_quiz_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.username}: {self.score}"
+
+
+class ChoiceTally(models.Model):
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name="choice_tallies"
+    )
+    choice = models.ForeignKey(
+        Choice,
+        on_delete=models.CASCADE,
+        related_name="tallies"
+    )
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Choice Tally"
+        verbose_name_plural = "Choice Tallies"
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'shard', 'choice'],
+                                    name='choice_tally_unique_shard'),
+        ]
+
+    def __str__(self):
+        return f"Choice {self.choice_id} (shard {self.shard}): {self.count}"
+
 
 class AttemptedAnswers(models.Model):
     attempt = models.ForeignKey(
@@ -115,28 +230,26 @@ class AttemptedAnswers(models.Model):
         verbose_name = "Answer"
         verbose_name_plural = "Answers"
         ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['attempt', 'question'],
+                                    name='answer_unique_attempt_question'),
+        ]
     
     def __str__(self):
         return f"Answer: {self.selected_choice.text} (Correct: {self.is_correct})" 
 
     def save(self, *args, **kwargs):
-        if not self.selected_choice:
+        if not self.selected_choice_id:
             raise ValueError("Selected choice cannot be null.")
-    
-        self.is_correct = self.selected_choice.is_correct
-    
-        if self.is_correct:
-            correct_choices = self.question.choices.filter(is_correct=True)
-            total_correct = correct_choices.count()
-        
-            if total_correct > 0:
-                points_per_correct_choice = 10 / total_correct
-                self.points_awarded = points_per_correct_choice
-            else:
-                self.points_awarded = 0
-        else:
-            self.points_awarded = 0
-    
+
+        from quiz_app.grading import get_answer_key
+
+        answer_key = get_answer_key(self.attempt.quiz)
+        self.is_correct, self.points_awarded = answer_key.grade(
+            self.question_id,
+            self.selected_choice_id
+        )
+
         super().save(*args, **kwargs)  
 
     
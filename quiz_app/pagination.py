@@ -0,0 +1,73 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over ``(start_time, id)``, newest first. The cursor
+    holds the last row's key, so every page is one range read on the
+    (quiz, -start_time, -id) index no matter how deep it is.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by('-start_time', '-id')
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        if cursor:
+            start_time, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(start_time__lt=start_time) | Q(start_time=start_time, id__lt=pk),
+                start_time__lte=start_time
+            )
+
+        page = list(queryset[:page_size + 1])
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        self.last = page[-1] if page else None
+
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.QUIZ_ATTEMPT_PAGE_SIZE
+
+        return max(1, min(page_size, settings.QUIZ_ATTEMPT_MAX_PAGE_SIZE))
+
+    def encode_cursor(self, attempt):
+        key = f"{attempt.start_time.isoformat()}|{attempt.pk}"
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            start_time, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(start_time), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor.")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode_cursor(self.last))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
@@ -0,0 +1,89 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from quiz_app.models import Quiz
+from quiz_app.serializers import QuizDetailSerializer
+
+
+def quiz_detail_cache_key(quiz_id, version):
+    return f"quiz-detail:{quiz_id}:{version}"
+
+
+def quiz_version_query(quiz_id):
+    return Quiz.objects.filter(id=quiz_id).values_list('version', flat=True)
+
+
+def get_quiz_version(quiz_id):
+    return quiz_version_query(quiz_id).first()
+
+
+def render_quiz_detail(quiz_id):
+    """
+    Render the quiz detail payload and store it under the quiz version that
+    was actually read. Returns ``(etag, content)`` or ``None`` if the quiz
+    does not exist.
+    """
+    quiz = (
+        Quiz.objects.select_related('creator')
+        .prefetch_related('questions__choices')
+        .filter(id=quiz_id)
+        .first()
+    )
+
+    if quiz is None:
+        return None
+
+    content = JSONRenderer().render(QuizDetailSerializer(quiz).data)
+    payload = (f'"{hashlib.sha1(content).hexdigest()}"', content)
+    cache.set(quiz_detail_cache_key(quiz.id, quiz.version), payload)
+
+    return payload
+
+
+def get_quiz_detail(quiz_id):
+    version = get_quiz_version(quiz_id)
+
+    if version is None:
+        return None
+
+    payload = cache.get(quiz_detail_cache_key(quiz_id, version))
+
+    if payload is None:
+        payload = render_quiz_detail(quiz_id)
+
+    return payload
+
+
+async def aget_quiz_detail(quiz_id):
+    version = await quiz_version_query(quiz_id).afirst()
+
+    if version is None:
+        return None
+
+    payload = await cache.aget(quiz_detail_cache_key(quiz_id, version))
+
+    if payload is None:
+        payload = await sync_to_async(render_quiz_detail)(quiz_id)
+
+    return payload
+
+
+def quiz_detail_response(request, payload):
+    etag, content = payload
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+
+    return response
@@ -0,0 +1,179 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils.timezone import now
+
+from quiz_app.models import Quiz
+
+
+OPEN = 'open'
+CLOSED = 'closed'
+MISSING = 'missing'
+
+QuizWindow = namedtuple('QuizWindow', ['id', 'title', 'start_time', 'end_time'])
+
+WINDOW_FIELDS = ('id', 'title', 'start_time', 'end_time')
+
+
+class ActiveQuizRegistry:
+    """
+    In-process registry of open quizzes, driven by a min-heap of their
+    start and end times.
+
+    The registry is loaded with every active quiz that is open or starts
+    within the next QUIZ_REGISTRY_TTL seconds and reloaded after that TTL.
+    Between reloads, transitions are applied by popping due heap events, so
+    admission checks and the active listing never hit the database for
+    known quizzes. Quizzes that close flip ``is_active`` (and the version)
+    in the database once; quizzes the registry does not know are looked up
+    on demand and remembered, including as closed.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.expires_at = None
+            self.windows = {}
+            self.open = set()
+            self.closed = set()
+            self.events = []
+            self.sequence = itertools.count()
+
+    def load(self, current_time):
+        deactivate_ended_quizzes(current_time)
+        windows = (
+            Quiz.objects.filter(
+                Q(end_time__isnull=True) | Q(end_time__gt=current_time),
+                is_active=True,
+                start_time__lte=current_time + timedelta(seconds=self.ttl)
+            )
+            .order_by()
+            .values_list(*WINDOW_FIELDS)
+        )
+
+        self.clear()
+        for window in windows:
+            self.schedule(QuizWindow(*window), current_time)
+        self.expires_at = time.monotonic() + self.ttl
+
+    def schedule(self, window, current_time):
+        if window.end_time is not None and window.end_time <= current_time:
+            self.closed.add(window.id)
+            return
+
+        self.windows[window.id] = window
+
+        if window.start_time <= current_time:
+            self.open.add(window.id)
+        else:
+            heapq.heappush(self.events, (window.start_time, next(self.sequence), OPEN, window.id))
+
+        if window.end_time is not None:
+            heapq.heappush(self.events, (window.end_time, next(self.sequence), CLOSED, window.id))
+
+    def advance(self, current_time):
+        ended = []
+
+        while self.events and self.events[0][0] <= current_time:
+            when, _, transition, quiz_id = heapq.heappop(self.events)
+            window = self.windows.get(quiz_id)
+
+            if window is None:
+                continue
+
+            if transition == OPEN and window.start_time == when:
+                self.open.add(quiz_id)
+            elif transition == CLOSED and window.end_time == when:
+                del self.windows[quiz_id]
+                self.open.discard(quiz_id)
+                self.closed.add(quiz_id)
+                ended.append(quiz_id)
+
+        return ended
+
+    def refresh(self):
+        current_time = now()
+
+        with self.lock:
+            if self.expires_at is None or time.monotonic() >= self.expires_at:
+                self.load(current_time)
+            ended = self.advance(current_time)
+
+        if ended:
+            deactivate_ended_quizzes(current_time, ended)
+
+        return current_time
+
+    def admission(self, quiz_id):
+        """Return OPEN, CLOSED or MISSING for a submission to ``quiz_id``."""
+        current_time = self.refresh()
+
+        with self.lock:
+            if quiz_id in self.open:
+                return OPEN
+            if quiz_id in self.windows or quiz_id in self.closed:
+                return CLOSED
+
+        quiz = Quiz.objects.filter(id=quiz_id).values_list(*WINDOW_FIELDS, 'is_active').first()
+
+        if quiz is None:
+            return MISSING
+
+        with self.lock:
+            self.forget(quiz_id)
+            if quiz[-1]:
+                self.schedule(QuizWindow(*quiz[:-1]), current_time)
+            else:
+                self.closed.add(quiz_id)
+
+            return OPEN if quiz_id in self.open else CLOSED
+
+    def active(self):
+        self.refresh()
+
+        with self.lock:
+            windows = [self.windows[quiz_id] for quiz_id in self.open]
+
+        return sorted(windows, key=lambda window: (window.start_time, window.id))
+
+    def track(self, quiz):
+        with self.lock:
+            if self.expires_at is None:
+                return
+
+            self.forget(quiz.pk)
+            if quiz.is_active:
+                self.schedule(
+                    QuizWindow(quiz.pk, quiz.title, quiz.start_time, quiz.end_time),
+                    now()
+                )
+            else:
+                self.closed.add(quiz.pk)
+
+    def forget(self, quiz_id):
+        with self.lock:
+            self.windows.pop(quiz_id, None)
+            self.open.discard(quiz_id)
+            self.closed.discard(quiz_id)
+
+
+def deactivate_ended_quizzes(current_time, quiz_ids=None):
+    quizzes = Quiz.objects.filter(is_active=True, end_time__lte=current_time)
+
+    if quiz_ids is not None:
+        quizzes = quizzes.filter(id__in=quiz_ids)
+
+    return quizzes.update(is_active=False, version=F('version') + 1)
+
+
+quiz_registry = ActiveQuizRegistry(getattr(settings, 'QUIZ_REGISTRY_TTL', 60))
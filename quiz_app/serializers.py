@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from quiz_app.models import (
     Quiz, 
@@ -6,6 +7,9 @@ from quiz_app.models import (
     QuizAttempt, 
     AttemptedAnswers
 )
+from quiz_app.authoring import create_quizzes
+from quiz_app.grading import get_answer_key, record_answers
+from quiz_app.tallies import removing_tallies
     
     
 class ChoiceSerializer(serializers.ModelSerializer):
@@ -23,6 +27,20 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ['id', 'text', 'choices']
 
 
+class ChoiceCreateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Choice
+        fields = ['id', 'text', 'is_correct']
+
+
+class QuestionCreateSerializer(serializers.ModelSerializer):
+    choices = ChoiceCreateSerializer(many=True)
+
+    class Meta:
+        model = Question
+        fields = ['id', 'text', 'choices']
+
+
 class AttemptedAnswerSerializer(serializers.ModelSerializer):
     question_text = serializers.CharField(source='question.text', read_only=True)
     selected_choice_text = serializers.CharField(source='selected_choice.text', read_only=True)
@@ -45,7 +63,7 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
         model = QuizAttempt
         fields = ['id', 'user_username', 'quiz_title',
                   'start_time', 'end_time', 'score',
-                  'feedback', 'answers']
+                  'feedback', 'status', 'answers']
 
 
 class QuizDetailSerializer(serializers.ModelSerializer):
@@ -62,7 +80,7 @@ class QuizDetailSerializer(serializers.ModelSerializer):
 
 
 class QuizCreateSerializer(serializers.ModelSerializer):
-    questions = QuestionSerializer(many=True)
+    questions = QuestionCreateSerializer(many=True)
 
     class Meta:
         model = Quiz
@@ -71,22 +89,11 @@ class QuizCreateSerializer(serializers.ModelSerializer):
                   'questions']
 
     def create(self, validated_data):
-        questions_data = validated_data.pop('questions')
         request = self.context.get('request')
+        creator = request.user if request and hasattr(request, 'user') else None
 
-        if request and hasattr(request, 'user'):
-            validated_data['creator'] = request.user
-
-        quiz = Quiz.objects.create(**validated_data)
-
-        for question_data in questions_data:
-            choices_data = question_data.pop('choices', [])
-            question = Question.objects.create(quiz=quiz,
-                                               **question_data)
-
-            for choice_data in choices_data:
-                Choice.objects.create(question=question,
-                                      **choice_data)
+        with transaction.atomic():
+            quiz, = create_quizzes(creator, [validated_data])
 
         return quiz
 
@@ -105,66 +112,88 @@ class QuizAttemptCreateSerializer(serializers.ModelSerializer):
         if not value:
             raise serializers.ValidationError("Answers cannot be empty.")
 
+        questions = set()
+
         for answer in value:
             if 'question' not in answer or 'selected_choice' not in answer:
                 raise serializers.ValidationError(
                     "Each answer must contain 'question' and 'selected_choice' keys."
                 )
+            if answer['question'] in questions:
+                raise serializers.ValidationError(
+                    f"Question ID {answer['question']} is answered more than once."
+                )
+            questions.add(answer['question'])
+
+        return value
 
-            try:
-                question = Question.objects.get(id=answer['question'])
-                if not (question.choices.filter(id=answer['selected_choice'])
-                        .exists()):
-                    raise serializers.ValidationError(
-                        f"Invalid choice for question ID {answer['question']}."
-                    )
-            except Question.DoesNotExist:
-                raise serializers.ValidationError(f"Question ID {answer['question']} does not exist.")
+    def validate_quiz(self, value):
+        if self.instance is not None and value.pk != self.instance.quiz_id:
+            raise serializers.ValidationError("The quiz of an attempt cannot be changed.")
 
         return value
 
+    def validate(self, attrs):
+        answers = attrs.get('answers')
+
+        if answers is None:
+            return attrs
+
+        quiz = self.instance.quiz if self.instance is not None else attrs['quiz']
+        self.answer_key = get_answer_key(quiz)
+
+        for answer in answers:
+            if not self.answer_key.has_question(answer['question']):
+                raise serializers.ValidationError(
+                    {'answers': f"Question ID {answer['question']} does not exist."}
+                )
+            if not self.answer_key.has_choice(answer['question'],
+                                              answer['selected_choice']):
+                raise serializers.ValidationError(
+                    {'answers': f"Invalid choice for question ID {answer['question']}."}
+                )
+
+        return attrs
+
     def create(self, validated_data):
         answers_data = validated_data.pop('answers', [])
         request = self.context.get('request')
         user = request.user if request and hasattr(request, 'user') else None
         validated_data.pop('user', None)
-        quiz_attempt = QuizAttempt.objects.create(user=user, **validated_data)
-        
-        for answer_data in answers_data:
-            AttemptedAnswers.objects.create(
-            attempt=quiz_attempt,
-            question_id=answer_data['question'],
-            selected_choice_id=answer_data['selected_choice']
-        )
-        quiz_attempt.calculate_score()
-    
+
+        if self.context.get('defer_grading'):
+            return QuizAttempt.objects.create(
+                user=user,
+                status=QuizAttempt.Status.PENDING,
+                pending_answers=answers_data,
+                **validated_data
+            )
+
+        with transaction.atomic():
+            quiz_attempt = QuizAttempt.objects.create(user=user, **validated_data)
+            total_score = record_answers(quiz_attempt, answers_data,
+                                         self.answer_key)
+            quiz_attempt.calculate_score(total_score)
+
         return quiz_attempt
 
     def update(self, instance, validated_data):
-        answers_data = validated_data.pop('answers', [])
-        instance.answers.all().delete()
-        attempted_answers = []
-        
-        for answer_data in answers_data:
-            question_id = answer_data['question']
-            selected_choice_id = answer_data['selected_choice']
-
-            question = Question.objects.get(id=question_id)
-            correct_choice = question.choices.filter(is_correct=True).first()
-
-            is_correct = correct_choice.id == selected_choice_id if correct_choice else False
-
-            attempted_answers.append(
-                AttemptedAnswers(
-                    attempt=instance,
-                    question_id=question_id,
-                    selected_choice_id=selected_choice_id,
-                    is_correct=is_correct
-                )
-            )
-        AttemptedAnswers.objects.bulk_create(attempted_answers)
-        
-        instance.calculate_score()
-        instance.save()
-        
+        if 'answers' not in validated_data:
+            return instance
+
+        answers_data = validated_data.pop('answers')
+
+        # Callers lock the attempt row in their own transaction (see
+        # QuizAttemptCRUDView.put), so no savepoint is needed here.
+        with transaction.atomic(savepoint=False):
+            with removing_tallies(instance):
+                instance.answers.all().delete()
+            total_score = record_answers(instance, answers_data,
+                                         self.answer_key)
+            if instance.status != QuizAttempt.Status.GRADED:
+                instance.status = QuizAttempt.Status.GRADED
+                instance.pending_answers = None
+                instance.save(update_fields=['status', 'pending_answers'])
+            instance.calculate_score(total_score)
+
         return instance
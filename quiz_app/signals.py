@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from quiz_app.authentication import bump_auth_version
+from quiz_app.models import Quiz, Question, Choice, AttemptedAnswers
+from quiz_app.registry import quiz_registry
+from quiz_app.tallies import remove_answer_tally
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def bump_quiz_version_for_question(sender, instance, **kwargs):
+    Quiz.objects.filter(id=instance.quiz_id).update(version=F('version') + 1)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def bump_quiz_version_for_choice(sender, instance, **kwargs):
+    Quiz.objects.filter(questions=instance.question_id).update(version=F('version') + 1)
+
+
+@receiver(pre_delete, sender=AttemptedAnswers)
+def remove_deleted_answer_tally(sender, instance, **kwargs):
+    remove_answer_tally(instance)
+
+
+@receiver(post_save, sender=Quiz)
+def track_quiz_window(sender, instance, **kwargs):
+    transaction.on_commit(lambda: quiz_registry.track(instance))
+
+
+@receiver(post_delete, sender=Quiz)
+def forget_quiz_window(sender, instance, **kwargs):
+    quiz_registry.forget(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+
+    bump_auth_version(instance.pk)
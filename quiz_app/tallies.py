@@ -0,0 +1,210 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, F, Sum, Value, When
+
+from quiz_app.caching import LRUCache
+from quiz_app.models import ChoiceTally
+
+
+live_counts_cache = LRUCache(getattr(settings, 'QUIZ_LIVE_MEMO_SIZE', 256))
+live_counts_lock = threading.Lock()
+
+# Set while answers whose selections were already taken off the tallies in
+# bulk are deleted (see removing_tallies).
+answer_tallies_removed = ContextVar('answer_tallies_removed', default=False)
+
+
+def add_tallies(quiz_id, attempt_id, choice_ids, sign=1):
+    """
+    Add (or with ``sign=-1`` remove) one selection per entry of ``choice_ids``
+    to the quiz's choice counters in two statements.
+
+    Counters are split over QUIZ_TALLY_SHARDS rows per choice and an attempt
+    only touches the shard picked by its id, so attempts graded at the same
+    moment rarely wait on each other's row locks.
+    """
+    counts = Counter(choice_ids)
+
+    if not counts:
+        return
+
+    shard = attempt_id % settings.QUIZ_TALLY_SHARDS
+
+    if sign > 0:
+        ChoiceTally.objects.bulk_create(
+            [
+                ChoiceTally(quiz_id=quiz_id, choice_id=choice_id, shard=shard)
+                for choice_id in counts
+            ],
+            ignore_conflicts=True
+        )
+
+    choices_by_count = {}
+    for choice_id, count in counts.items():
+        choices_by_count.setdefault(count, []).append(choice_id)
+
+    ChoiceTally.objects.filter(
+        quiz_id=quiz_id,
+        shard=shard,
+        choice_id__in=counts
+    ).update(count=F('count') + Case(
+        *(
+            When(choice_id__in=choice_ids, then=Value(sign * count))
+            for count, choice_ids in choices_by_count.items()
+        ),
+        default=Value(0)
+    ))
+
+
+def remove_tallies(attempt):
+    choice_ids = list(attempt.answers.values_list('selected_choice_id', flat=True))
+    add_tallies(attempt.quiz_id, attempt.pk, choice_ids, sign=-1)
+
+
+@contextmanager
+def removing_tallies(attempt):
+    """
+    Take the attempt's selections off the tallies in two statements for the
+    answers deleted in the block, instead of one update per answer.
+    """
+    remove_tallies(attempt)
+    token = answer_tallies_removed.set(True)
+    try:
+        yield
+    finally:
+        answer_tallies_removed.reset(token)
+
+
+def remove_answer_tally(answer):
+    """
+    Take a deleted answer's selection off its tally, for deletions that do
+    not go through removing_tallies (the admin, cascades from users).
+    """
+    if answer_tallies_removed.get():
+        return
+
+    ChoiceTally.objects.filter(
+        choice_id=answer.selected_choice_id,
+        shard=answer.attempt_id % settings.QUIZ_TALLY_SHARDS
+    ).update(count=F('count') - 1)
+
+
+def get_choice_counts(quiz_id):
+    return dict(
+        ChoiceTally.objects.filter(quiz_id=quiz_id)
+        .order_by()
+        .values_list('choice_id')
+        .annotate(total=Sum('count'))
+    )
+
+
+def live_choice_counts(quiz_id, tick):
+    """
+    Return the choice counts of a quiz for the given tick number, reading
+    them at most once per tick and process however many streams ask.
+    """
+    cached = live_counts_cache.get(quiz_id)
+
+    if cached is None or cached[0] != tick:
+        with live_counts_lock:
+            cached = live_counts_cache.get(quiz_id)
+            if cached is None or cached[0] != tick:
+                cached = (tick, get_choice_counts(quiz_id))
+                live_counts_cache.set(quiz_id, cached)
+
+    return cached[1]
+
+
+def server_sent_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def live_counts_event(counts, sent):
+    if sent is None:
+        return server_sent_event('snapshot', counts)
+
+    delta = {
+        choice_id: count for choice_id, count in counts.items()
+        if sent.get(choice_id) != count
+    }
+    return server_sent_event('delta', delta) if delta else ": no changes\n\n"
+
+
+def live_schedule():
+    """
+    Yield ``(tick_number, delay)`` for each tick of one stream: the seconds
+    to wait before reading the counts of that tick, for
+    QUIZ_LIVE_STREAM_DURATION seconds.
+    """
+    tick = settings.QUIZ_LIVE_TICK
+    deadline = time.monotonic() + settings.QUIZ_LIVE_STREAM_DURATION
+    tick_number = int(time.monotonic() // tick)
+    delay = 0
+
+    while True:
+        yield tick_number, delay
+
+        if time.monotonic() >= deadline:
+            return
+
+        next_tick = max(tick_number + 1, int(time.monotonic() // tick))
+        delay = max(0, next_tick * tick - time.monotonic())
+        tick_number = next_tick
+
+
+def close_idle_connections():
+    """Hand this thread's database connections back while a stream waits."""
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def stream_live_counts(quiz_id):
+    """
+    Yield server-sent events with the quiz's choice counts: a ``snapshot``
+    first, then a ``delta`` with only the changed counters once per
+    QUIZ_LIVE_TICK seconds (a comment when nothing changed).
+
+    The stream ends after QUIZ_LIVE_STREAM_DURATION seconds, which is kept
+    below the worker timeout, and EventSource clients reconnect after the
+    ``retry`` delay. The thread's database connections are closed (or
+    returned to the pool) between ticks.
+    """
+    sent = None
+    yield f"retry: {int(settings.QUIZ_LIVE_TICK * 1000)}\n\n"
+
+    for tick_number, delay in live_schedule():
+        if delay:
+            close_idle_connections()
+            time.sleep(delay)
+
+        counts = live_choice_counts(quiz_id, tick_number)
+        yield live_counts_event(counts, sent)
+        sent = counts
+
+
+async def astream_live_counts(quiz_id):
+    """
+    Asynchronous ``stream_live_counts`` for ASGI servers: a stream holds no
+    thread while it waits for the next tick.
+    """
+    sent = None
+    yield f"retry: {int(settings.QUIZ_LIVE_TICK * 1000)}\n\n"
+
+    for tick_number, delay in live_schedule():
+        if delay:
+            await sync_to_async(close_idle_connections)()
+            await asyncio.sleep(delay)
+
+        counts = await sync_to_async(live_choice_counts)(quiz_id, tick_number)
+        yield live_counts_event(counts, sent)
+        sent = counts
@@ -1,15 +1,66 @@
+import csv
+import io
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.response import Response
 from rest_framework.test import APIClient
-from django.test import TestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from django.test import (
+    AsyncClient,
+    LiveServerTestCase,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
 from quiz_app.models import (
     Quiz, 
     User, 
     Question, 
     Choice,
-    QuizAttempt
+    QuizAttempt,
+    AttemptedAnswers,
+    ChoiceTally,
+    LeaderboardEntry
 )
+from quiz_app import registry, tallies
+from quiz_app.admin import EstimatedCountPaginator
+from quiz_app.authentication import (
+    CachedJWTAuthentication,
+    auth_version_key,
+    get_auth_version,
+    user_cache
+)
+from quiz_app.grading import answer_key_cache, get_answer_key, grade_pending_attempts, regrade_quiz
+from quiz_app.idempotency import idempotent
+from quiz_app.management.commands.bench import Command as BenchCommand
+from quiz_app.management.commands.serve import Command as ServeCommand, QuizServer, post_fork
+from quiz_app.registry import quiz_registry
+from quiz_app.tallies import get_choice_counts, live_counts_cache
+from quiz_app.throttling import ConcurrencyLimiter, SlidingWindowThrottle, grading_limiter
+from quiz_app.warmup import warm_up
+from Quiz.graphql_views import document_cache, query_hash
+from Quiz.routers import PRIMARY_PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware
 from django.utils import timezone
+from graphql import parse as graphql_parse
 
 
 class QuizApiTestCase(TestCase):
@@ -92,9 +143,1656 @@ class QuizApiTestCase(TestCase):
             ]
         }
         response = self.client.post(url, payload, format='json')
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
         self.assertIn('quiz_attempt_id', response.data)
         self.assertEqual(QuizAttempt.objects.count(), 1)
         quiz_attempt = QuizAttempt.objects.first()
         self.assertEqual(quiz_attempt.quiz.id, self.quiz1.id)
         self.assertEqual(quiz_attempt.user.id, self.user.id)
+
+
+SUBMISSION_QUERY_BUDGET = 12
+
+
+class AttemptSubmissionTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="student", password="password123")
+        self.client.force_authenticate(user=self.user)
+        answer_key_cache.clear()
+        quiz_registry.clear()
+        quiz_registry.refresh()
+
+    def create_quiz(self, question_count):
+        quiz = Quiz.objects.create(
+            creator=self.user,
+            title=f"Quiz with {question_count} questions",
+            start_time=timezone.now() - timezone.timedelta(minutes=1),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        answers = []
+
+        for number in range(question_count):
+            question = Question.objects.create(quiz=quiz, text=f"Question {number}?")
+            Choice.objects.create(question=question, text="Wrong", is_correct=False)
+            correct = Choice.objects.create(question=question, text="Right", is_correct=True)
+            answers.append({"question": question.id, "selected_choice": correct.id})
+
+        return quiz, answers
+
+    def submit(self, quiz, answers):
+        url = reverse('quiz-attempt-create')
+        payload = {"quiz": quiz.id, "answers": answers}
+        return self.client.post(url, payload, format='json')
+
+    def test_submission_query_count_is_constant(self):
+        query_counts = []
+
+        for question_count in (1, 50):
+            quiz, answers = self.create_quiz(question_count)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.submit(quiz, answers)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertLessEqual(query_counts[1], SUBMISSION_QUERY_BUDGET)
+
+    def test_submission_grades_answers(self):
+        quiz, answers = self.create_quiz(3)
+        wrong_choice = Choice.objects.get(question_id=answers[0]['question'], is_correct=False)
+        answers[0]['selected_choice'] = wrong_choice.id
+
+        response = self.submit(quiz, answers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        attempt = QuizAttempt.objects.get(id=response.data['quiz_attempt_id'])
+        self.assertEqual(attempt.score, 20)
+        self.assertEqual(attempt.answers.filter(is_correct=True).count(), 2)
+
+    def test_submission_rejects_choice_from_other_question(self):
+        quiz, answers = self.create_quiz(2)
+        answers[0]['selected_choice'] = answers[1]['selected_choice']
+
+        response = self.submit(quiz, answers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    def test_idempotency_key_replays_the_original_response(self):
+        cache.clear()
+        quiz, answers = self.create_quiz(3)
+        url = reverse('quiz-attempt-create')
+        payload = {"quiz": quiz.id, "answers": answers}
+        headers = {'Idempotency-Key': 'retry-1'}
+
+        first = self.client.post(url, payload, format='json', headers=headers)
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.client.post(url, payload, format='json', headers=headers)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+        answers[0]['selected_choice'] += 1
+        response = self.client.post(url, {"quiz": quiz.id, "answers": answers},
+                                    format='json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_concurrent_duplicate_is_rejected_not_a_server_error(self):
+        quiz, answers = self.create_quiz(2)
+        self.submit(quiz, answers)
+
+        # The duplicate passes the exists() check, as a concurrent one would.
+        with mock.patch('django.db.models.query.QuerySet.exists', return_value=False):
+            response = self.submit(quiz, answers)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], "You have already attempted this quiz.")
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+    def test_warm_submission_skips_question_and_choice_tables(self):
+        quiz, answers = self.create_quiz(5)
+        self.submit(quiz, answers)
+
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="second", password="password123")
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.submit(quiz, answers)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        for query in queries.captured_queries:
+            self.assertNotIn('"quiz_app_choice"', query['sql'])
+            self.assertNotIn('"quiz_app_question"', query['sql'])
+
+    def test_answer_key_change_bumps_quiz_version(self):
+        quiz, answers = self.create_quiz(1)
+        self.submit(quiz, answers)
+
+        choice = Choice.objects.get(id=answers[0]['selected_choice'])
+        choice.is_correct = False
+        choice.save()
+        quiz.refresh_from_db()
+        self.assertGreater(quiz.version, 1)
+
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="second", password="password123")
+        )
+        response = self.submit(quiz, answers)
+        attempt = QuizAttempt.objects.get(id=response.data['quiz_attempt_id'])
+        self.assertEqual(attempt.score, 0)
+
+    def test_async_submission_is_graded_by_worker(self):
+        quiz, answers = self.create_quiz(3)
+        url = reverse('quiz-attempt-create')
+        payload = {"quiz": quiz.id, "answers": answers}
+
+        response = self.client.post(url, payload, format='json',
+                                    HTTP_PREFER='respond-async')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(AttemptedAnswers.objects.exists())
+
+        status_url = response['Location']
+        pending = self.client.get(status_url)
+        self.assertEqual(pending.data['status'], 'pending')
+        self.assertIsNone(pending.data['score'])
+        self.assertIn('Retry-After', pending)
+
+        self.assertEqual(grade_pending_attempts(10), 1)
+        self.assertEqual(grade_pending_attempts(10), 0)
+
+        graded = self.client.get(status_url)
+        self.assertEqual(graded.data['status'], 'graded')
+        self.assertEqual(graded.data['score'], 30)
+        self.assertEqual(LeaderboardEntry.objects.get(quiz=quiz).score, 30)
+
+    @override_settings(QUIZ_ASYNC_GRADING=True)
+    def test_update_waits_for_pending_grading(self):
+        quiz, answers = self.create_quiz(2)
+        attempt_id = self.submit(quiz, answers).data['quiz_attempt_id']
+        url = reverse('quiz-attempt-crud', kwargs={'attempt_id': attempt_id})
+
+        response = self.client.put(url, {"answers": answers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn('Retry-After', response)
+        self.assertFalse(AttemptedAnswers.objects.exists())
+
+        self.assertEqual(grade_pending_attempts(10), 1)
+        response = self.client.put(url, {"answers": answers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AttemptedAnswers.objects.filter(attempt_id=attempt_id).count(), 2)
+        self.assertEqual(QuizAttempt.objects.get(id=attempt_id).score, 20)
+
+    def test_update_cannot_move_attempt_to_another_quiz(self):
+        quiz, answers = self.create_quiz(2)
+        other_quiz, other_answers = self.create_quiz(2)
+        attempt_id = self.submit(quiz, answers).data['quiz_attempt_id']
+        url = reverse('quiz-attempt-crud', kwargs={'attempt_id': attempt_id})
+
+        response = self.client.put(url, {"quiz": other_quiz.id, "answers": other_answers},
+                                   format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quiz', response.data)
+
+        response = self.client.put(url, {"answers": other_answers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(AttemptedAnswers.objects.filter(question__quiz=other_quiz).exists())
+
+        response = self.client.put(url, {"quiz": quiz.id, "answers": answers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_regrade_chunks_skip_other_quizzes_attempts(self):
+        quiz, answers = self.create_quiz(1)
+        other_quiz, other_answers = self.create_quiz(1)
+        for number, (target, target_answers) in enumerate(
+            [(quiz, answers)] + [(other_quiz, other_answers)] * 5 + [(quiz, answers)]
+        ):
+            self.client.force_authenticate(
+                user=User.objects.create_user(username=f"regraded{number}", password="password123")
+            )
+            self.submit(target, target_answers)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(regrade_quiz(quiz, chunk_size=1), 2)
+        updates = [query for query in queries.captured_queries
+                   if query['sql'].startswith('UPDATE')]
+        # Three per chunk of one attempt, and the version bump.
+        self.assertEqual(len(updates), 2 * 3 + 1)
+
+    def test_each_question_is_answered_once(self):
+        quiz, answers = self.create_quiz(2)
+
+        response = self.submit(quiz, answers + answers[:1])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+        attempt = QuizAttempt.objects.create(user=self.user, quiz=quiz)
+        AttemptedAnswers.objects.create(attempt=attempt, question_id=answers[0]['question'],
+                                        selected_choice_id=answers[0]['selected_choice'])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AttemptedAnswers.objects.create(attempt=attempt, question_id=answers[0]['question'],
+                                            selected_choice_id=answers[0]['selected_choice'])
+
+    @override_settings(QUIZ_ASYNC_GRADING=True)
+    def test_async_submission_still_validates_and_marks_failures(self):
+        quiz, answers = self.create_quiz(2)
+        answers[0]['selected_choice'] = answers[1]['selected_choice']
+        self.assertEqual(self.submit(quiz, answers).status_code, status.HTTP_400_BAD_REQUEST)
+
+        quiz, answers = self.create_quiz(2)
+        response = self.submit(quiz, answers)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        Question.objects.filter(id=answers[0]['question']).delete()
+
+        with self.assertLogs('quiz_app.grading', 'ERROR'):
+            self.assertEqual(grade_pending_attempts(10), 1)
+        attempt = QuizAttempt.objects.get(id=response.data['quiz_attempt_id'])
+        self.assertEqual(attempt.status, QuizAttempt.Status.FAILED)
+        self.assertEqual(attempt.pending_answers, answers)
+        self.assertFalse(attempt.answers.exists())
+
+    def test_regrade_quiz_after_answer_key_fix(self):
+        quiz, answers = self.create_quiz(2)
+        self.submit(quiz, answers)
+        for username in ("second", "third"):
+            self.client.force_authenticate(
+                user=User.objects.create_user(username=username, password="password123")
+            )
+            self.submit(quiz, answers)
+
+        first_question = answers[0]['question']
+        Choice.objects.filter(question_id=first_question).update(is_correct=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(regrade_quiz(quiz), 3)
+        statements = [query['sql'] for query in queries.captured_queries
+                      if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertLessEqual(len(statements), 6)
+
+        call_command('regrade_quiz', quiz.id, '--chunk-size', '1', stdout=io.StringIO())
+
+        for attempt in QuizAttempt.objects.filter(quiz=quiz):
+            self.assertEqual(attempt.score, 15)
+            self.assertEqual(attempt.leaderboard_entry.score, 15)
+            answer = attempt.answers.get(question_id=first_question)
+            self.assertTrue(answer.is_correct)
+            self.assertEqual(answer.points_awarded, 5)
+
+
+class LeaderboardTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.creator = User.objects.create_user(username="creator", password="password123")
+        self.quiz = Quiz.objects.create(
+            creator=self.creator,
+            title="Ranked Quiz",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+
+        for username, score in [("ann", 30), ("bob", 20), ("cid", 20), ("dan", 10)]:
+            user = User.objects.create_user(username=username, password="password123")
+            attempt = QuizAttempt.objects.create(user=user, quiz=self.quiz)
+            attempt.calculate_score(score)
+
+        self.client.force_authenticate(user=User.objects.get(username="dan"))
+
+    def get_leaderboard(self, **params):
+        url = reverse('quiz-leaderboard', kwargs={'quiz_id': self.quiz.pk})
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_ties_share_competition_rank(self):
+        data = self.get_leaderboard()
+        ranks = [(row['username'], row['rank']) for row in data['leaderboard']]
+        self.assertEqual(ranks, [("ann", 1), ("bob", 2), ("cid", 2), ("dan", 4)])
+        self.assertIsNone(data['next_offset'])
+
+    def test_dense_ranking_and_pagination(self):
+        data = self.get_leaderboard(ranking='dense', limit=2, offset=2)
+        ranks = [(row['username'], row['rank']) for row in data['leaderboard']]
+        self.assertEqual(ranks, [("cid", 2), ("dan", 3)])
+
+        data = self.get_leaderboard(limit=2)
+        self.assertEqual(data['next_offset'], 2)
+
+    def test_out_of_range_params_name_their_bounds(self):
+        url = reverse('quiz-leaderboard', kwargs={'quiz_id': self.quiz.pk})
+
+        response = self.client.get(url, {'offset': -1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['offset'], "Must be at least 0.")
+
+        response = self.client.get(url, {'limit': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['limit'],
+            f"Must be between 1 and {settings.QUIZ_LEADERBOARD_MAX_PAGE_SIZE}."
+        )
+
+    def test_my_rank(self):
+        url = reverse('quiz-leaderboard-me', kwargs={'quiz_id': self.quiz.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rank'], 4)
+
+        self.client.force_authenticate(user=self.creator)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rescoring_updates_entry(self):
+        attempt = QuizAttempt.objects.get(user__username="dan")
+        attempt.calculate_score(40)
+
+        data = self.get_leaderboard(limit=1)
+        self.assertEqual(data['leaderboard'][0]['username'], "dan")
+
+
+class QuizDetailTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="candidate", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.quiz = Quiz.objects.create(
+            creator=self.user,
+            title="Cached Quiz",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+
+        for number in range(5):
+            question = Question.objects.create(quiz=self.quiz, text=f"Question {number}?")
+            Choice.objects.create(question=question, text="Wrong", is_correct=False)
+            Choice.objects.create(question=question, text="Right", is_correct=True)
+
+        self.url = reverse('quiz-detail', kwargs={'pk': self.quiz.pk})
+
+    def test_detail_is_rendered_once_per_version(self):
+        with CaptureQueriesContext(connection) as cold:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['questions']), 5)
+        self.assertLessEqual(len(cold), 4)
+
+        with CaptureQueriesContext(connection) as warm:
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(len(warm), 1)
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_edits_invalidate_payload(self):
+        etag = self.client.get(self.url)['ETag']
+
+        choice = Choice.objects.filter(question__quiz=self.quiz).first()
+        choice.text = "Edited"
+        choice.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        self.quiz.title = "Renamed Quiz"
+        self.quiz.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['title'], "Renamed Quiz")
+
+    def test_missing_quiz_returns_not_found(self):
+        url = reverse('quiz-detail', kwargs={'pk': self.quiz.pk + 100})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(QUIZ_GRAPHQL_MAX_ROWS=10 ** 6)
+class GraphQLBatchingTestCase(TestCase):
+    QUERY = """
+        query {
+            allQuizzes(first: 20) {
+                edges {
+                    node {
+                        title
+                        questions {
+                            text
+                            choices { text }
+                        }
+                        attempts {
+                            score
+                            answers { selectedChoice { text } question { text } }
+                        }
+                    }
+                }
+            }
+        }
+    """
+
+    def setUp(self):
+        document_cache.clear()
+        self.user = User.objects.create_user(username="author", password="password123")
+
+    def create_quiz(self, number):
+        quiz = Quiz.objects.create(
+            creator=self.user,
+            title=f"Quiz {number}",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        attempt = QuizAttempt.objects.create(user=self.user, quiz=quiz)
+
+        for index in range(3):
+            question = Question.objects.create(quiz=quiz, text=f"Question {index}?")
+            choice = Choice.objects.create(question=question, text="Right", is_correct=True)
+            Choice.objects.create(question=question, text="Wrong", is_correct=False)
+            AttemptedAnswers.objects.create(attempt=attempt, question=question,
+                                            selected_choice=choice)
+
+    def execute(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/graphql/', {"query": query},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), len(queries)
+
+    def test_nested_query_count_does_not_grow_with_rows(self):
+        self.create_quiz(0)
+        data, single = self.execute(self.QUERY)
+        self.assertEqual(len(data['data']['allQuizzes']['edges']), 1)
+
+        for number in range(1, 5):
+            self.create_quiz(number)
+        data, many = self.execute(self.QUERY)
+
+        edges = data['data']['allQuizzes']['edges']
+        self.assertEqual(len(edges), 5)
+        self.assertEqual(len(edges[4]['node']['attempts'][0]['answers']), 3)
+        self.assertEqual(single, many)
+
+    def test_page_size_limit_is_enforced(self):
+        data, _ = self.execute("query { allQuizzes(first: 1000) { edges { node { title } } } }")
+        self.assertIn('errors', data)
+
+    def test_graphiql_is_served_without_graphene_django_installed(self):
+        response = self.client.get('/graphql/', headers={'Accept': 'text/html'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, 'graphene_django/graphiql.js')
+
+
+class GraphQLCostTestCase(TestCase):
+    def setUp(self):
+        document_cache.clear()
+
+    def execute(self, payload):
+        response = self.client.post('/graphql/', payload, content_type='application/json')
+        return response.status_code, response.json()
+
+    def test_deep_query_is_rejected(self):
+        nested = "quiz { questions { " * 6 + "id" + " } }" * 6
+        query = "query { allQuestions(first: 1) { edges { node { " + nested + " } } } }"
+
+        status_code, data = self.execute({"query": query})
+        self.assertEqual(status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("depth", data['errors'][0]['message'])
+
+    def test_expensive_fan_out_is_rejected(self):
+        query = """
+            query { allQuizzes(first: 100) { edges { node {
+                attempts { answers { isCorrect } }
+            } } } }
+        """
+        status_code, data = self.execute({"query": query})
+        self.assertEqual(status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("rows", data['errors'][0]['message'])
+
+    def test_reused_fragments_are_counted_each_time(self):
+        query = """
+            query { allQuizzes(first: 1) { edges { node {
+                ...F
+                questions { quiz { ...F } }
+            } } } }
+            fragment F on QuizType { attempts { answers { isCorrect } } }
+        """
+        status_code, data = self.execute({"query": query})
+        self.assertEqual(status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("rows", data['errors'][0]['message'])
+
+    def test_documents_are_parsed_once(self):
+        query = "query { allQuizzes(first: 5) { edges { node { title } } } }"
+
+        with mock.patch('Quiz.graphql_views.parse', wraps=graphql_parse) as parse:
+            self.execute({"query": query})
+            self.execute({"query": query})
+        self.assertEqual(parse.call_count, 1)
+
+    def test_persisted_query_round_trip(self):
+        query = "query { allQuizzes(first: 5) { edges { node { title } } } }"
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+
+        _, data = self.execute({"extensions": extensions})
+        self.assertEqual(data['errors'][0]['message'], "PersistedQueryNotFound")
+
+        status_code, data = self.execute({"query": query, "extensions": extensions})
+        self.assertEqual(status_code, status.HTTP_200_OK)
+
+        status_code, data = self.execute({"extensions": extensions})
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(data['data']['allQuizzes']['edges'], [])
+
+
+class AttemptExportTestCase(TestCase):
+    def setUp(self):
+        answer_key_cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(username="teacher", password="password123")
+        self.client.force_authenticate(user=self.creator)
+        self.quiz = Quiz.objects.create(
+            creator=self.creator,
+            title="Exported Quiz",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        questions = [
+            Question.objects.create(quiz=self.quiz, text=f"Question {number}?")
+            for number in range(2)
+        ]
+        choices = [
+            Choice.objects.create(question=question, text="Right", is_correct=True)
+            for question in questions
+        ]
+
+        for number in range(3):
+            user = User.objects.create_user(username=f"student{number}", password="password123")
+            attempt = QuizAttempt.objects.create(user=user, quiz=self.quiz)
+            for question, choice in zip(questions, choices):
+                AttemptedAnswers.objects.create(attempt=attempt, question=question,
+                                                selected_choice=choice)
+            attempt.calculate_score()
+
+        self.url = reverse('quiz-attempt-list', kwargs={'quiz_id': self.quiz.pk})
+
+    def test_ndjson_export_streams_one_attempt_per_line(self):
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0]['quiz_title'], "Exported Quiz")
+        self.assertEqual(len(records[0]['answers']), 2)
+        self.assertEqual(records[0]['score'], 20)
+
+    def test_csv_export_has_one_row_per_answer(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['answer_selected_choice_text'], "Right")
+
+
+class AttemptListingTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.creator = User.objects.create_user(username="teacher", password="password123")
+        self.client.force_authenticate(user=self.creator)
+        self.quiz = Quiz.objects.create(
+            creator=self.creator,
+            title="Listed Quiz",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        started = timezone.now()
+
+        for number in range(7):
+            user = User.objects.create(username=f"student{number}")
+            attempt = QuizAttempt.objects.create(user=user, quiz=self.quiz)
+            QuizAttempt.objects.filter(id=attempt.id).update(
+                start_time=started - timezone.timedelta(minutes=number // 2)
+            )
+
+    def test_cursor_pagination_walks_every_attempt_once(self):
+        url = reverse('quiz-attempt-list', kwargs={'quiz_id': self.quiz.pk})
+        seen = []
+        params = {'page_size': 3}
+
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen.extend(attempt['id'] for attempt in response.data['results'])
+            url, params = response.data['next'], None
+
+        expected = list(
+            QuizAttempt.objects.filter(quiz=self.quiz)
+            .order_by('-start_time', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def assert_uses_index(self, queryset, index_name):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        self.assertIn(index_name, queryset.explain())
+
+    def test_listing_queries_use_composite_indexes(self):
+        self.assert_uses_index(
+            QuizAttempt.objects.filter(quiz=self.quiz).order_by('-start_time', '-id'),
+            'attempt_quiz_start_idx'
+        )
+        self.assert_uses_index(
+            QuizAttempt.objects.filter(quiz=self.quiz).order_by('-score'),
+            'attempt_quiz_score_idx'
+        )
+        self.assert_uses_index(
+            AttemptedAnswers.objects.filter(attempt_id=1).order_by('id'),
+            'quiz_app_attemptedanswers_attempt_id'
+        )
+
+
+class QuizAuthoringTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="author", password="password123")
+        self.client.force_authenticate(user=self.user)
+
+    def quiz_payload(self, title, question_count):
+        return {
+            "title": title,
+            "start_time": timezone.now().isoformat(),
+            "end_time": (timezone.now() + timezone.timedelta(hours=1)).isoformat(),
+            "questions": [
+                {
+                    "text": f"Question {number}?",
+                    "choices": [
+                        {"text": "Wrong", "is_correct": False},
+                        {"text": "Right", "is_correct": True},
+                    ]
+                }
+                for number in range(question_count)
+            ]
+        }
+
+    def test_create_quiz_query_count_is_constant(self):
+        url = reverse('quiz-create')
+        query_counts = []
+
+        for question_count in (1, 40):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(url, self.quiz_payload("Bulk", question_count),
+                                            format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        quiz = Quiz.objects.get(id=response.data['quiz_id'])
+        self.assertEqual(quiz.questions.count(), 40)
+        self.assertEqual(Choice.objects.filter(question__quiz=quiz, is_correct=True).count(), 40)
+
+    def test_import_quizzes_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as bank:
+            for number in range(5):
+                bank.write(json.dumps(self.quiz_payload(f"Imported {number}", 3)) + "\n")
+            bank.write("{not json}\n")
+        self.addCleanup(os.remove, bank.name)
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_quizzes', bank.name, creator="author", batch_size=2,
+                     stdout=stdout, stderr=stderr)
+
+        self.assertEqual(Quiz.objects.filter(title__startswith="Imported").count(), 5)
+        self.assertEqual(Question.objects.filter(quiz__title="Imported 4").count(), 3)
+        self.assertIn("Imported 4 quizzes", stdout.getvalue())
+        self.assertIn("skipped 1 invalid lines", stdout.getvalue())
+        self.assertIn("Line 6", stderr.getvalue())
+
+
+class AsyncEndpointsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.clear()
+        self.user = User.objects.create_user(username="candidate", password="password123")
+        self.quiz = Quiz.objects.create(
+            creator=self.user,
+            title="Async Quiz",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        question = Question.objects.create(quiz=self.quiz, text="Async?")
+        self.right = Choice.objects.create(question=question, text="Yes", is_correct=True)
+        Choice.objects.create(question=question, text="No", is_correct=False)
+
+        self.attempt = QuizAttempt.objects.create(user=self.user, quiz=self.quiz)
+        AttemptedAnswers.objects.create(
+            attempt=self.attempt, question=question, selected_choice=self.right
+        )
+        self.attempt.calculate_score()
+
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.async_client = AsyncClient()
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(user=self.user)
+
+    async def test_async_views_match_sync_views(self):
+        for sync_name, async_name, kwargs in [
+            ('quiz-detail', 'async-quiz-detail', {'pk': self.quiz.pk}),
+            ('quiz-leaderboard', 'async-quiz-leaderboard', {'quiz_id': self.quiz.pk}),
+            ('quiz-attempt-crud', 'async-quiz-attempt', {'attempt_id': self.attempt.pk}),
+        ]:
+            response = await self.async_client.get(
+                reverse(async_name, kwargs=kwargs), headers=self.headers
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            expected = await sync_to_async(self.sync_client.get)(reverse(sync_name, kwargs=kwargs))
+            self.assertEqual(response.json(), expected.json())
+
+    async def test_async_detail_honours_etag(self):
+        url = reverse('async-quiz-detail', kwargs={'pk': self.quiz.pk})
+        etag = (await self.async_client.get(url, headers=self.headers))['ETag']
+
+        response = await self.async_client.get(
+            url, headers={**self.headers, 'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_async_views_require_authentication(self):
+        url = reverse('async-quiz-leaderboard', kwargs={'quiz_id': self.quiz.pk})
+        response = await AsyncClient().get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await AsyncClient().get(url, headers={'Authorization': 'Bearer invalid'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_async_errors(self):
+        url = reverse('async-quiz-leaderboard', kwargs={'quiz_id': self.quiz.pk})
+        response = await self.async_client.get(url, {'ranking': 'olympic'}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ranking', response.json())
+
+        url = reverse('async-quiz-attempt', kwargs={'attempt_id': self.attempt.pk + 100})
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QuizAnalyticsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(username="author", password="password123")
+        self.client.force_authenticate(user=self.creator)
+        self.quiz = Quiz.objects.create(
+            creator=self.creator,
+            title="Analysed Quiz",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        self.choices = []
+        for number in range(2):
+            question = Question.objects.create(quiz=self.quiz, text=f"Question {number}?")
+            self.choices.append((
+                Choice.objects.create(question=question, text="Right", is_correct=True),
+                Choice.objects.create(question=question, text="Wrong", is_correct=False),
+            ))
+
+        for username, picks in [("a", (0, 0)), ("b", (0, 1)), ("c", (1, 1)), ("d", (0,))]:
+            self.attempt(username, picks)
+
+        self.url = reverse('quiz-analytics', kwargs={'quiz_id': self.quiz.pk})
+
+    def attempt(self, username, picks):
+        user = User.objects.create_user(username=username, password="password123")
+        attempt = QuizAttempt.objects.create(user=user, quiz=self.quiz)
+        for (right, wrong), pick in zip(self.choices, picks):
+            choice = wrong if pick else right
+            AttemptedAnswers.objects.create(
+                attempt=attempt, question=choice.question, selected_choice=choice
+            )
+        attempt.calculate_score()
+        return attempt
+
+    def test_item_statistics(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['attempts'], 4)
+
+        first, second = response.data['questions']
+        self.assertEqual(first['answered'], 4)
+        self.assertEqual(first['p_value'], 0.75)
+        self.assertEqual([c['selection_rate'] for c in first['choices']], [0.75, 0.25])
+        self.assertEqual(second['answered'], 3)
+        self.assertEqual(second['p_value'], 0.25)
+
+        correct = [1, 1, 0, 1]
+        totals = [20, 10, 0, 10]
+        expected = statistics.correlation(correct, totals)
+        self.assertAlmostEqual(first['point_biserial'], expected, places=4)
+
+    def test_results_are_cached_until_attempts_change(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(len(queries), 1)
+
+        self.attempt("e", (1, 1))
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['attempts'], 5)
+
+    def test_results_follow_updated_answers(self):
+        self.client.get(self.url)
+        attempt = self.attempt("e", (1, 1))
+        self.assertEqual(self.client.get(self.url).data['questions'][1]['p_value'], 0.2)
+
+        self.client.force_authenticate(user=attempt.user)
+        response = self.client.put(
+            reverse('quiz-attempt-crud', kwargs={'attempt_id': attempt.id}),
+            {"answers": [{"question": right.question_id, "selected_choice": right.id}
+                         for right, _ in self.choices]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.creator)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['attempts'], 5)
+        self.assertEqual(response.data['questions'][1]['p_value'], 0.4)
+
+    def test_quiz_without_attempts(self):
+        quiz = Quiz.objects.create(creator=self.creator, title="Empty", start_time=timezone.now())
+        question = Question.objects.create(quiz=quiz, text="Unanswered?")
+        Choice.objects.create(question=question, text="Right", is_correct=True)
+        url = reverse('quiz-analytics', kwargs={'quiz_id': quiz.pk})
+
+        question, = self.client.get(url).data['questions']
+        self.assertEqual(question['answered'], 0)
+        self.assertIsNone(question['p_value'])
+        self.assertIsNone(question['point_biserial'])
+
+
+@override_settings(QUIZ_TALLY_SHARDS=2, QUIZ_LIVE_TICK=0.01, QUIZ_LIVE_STREAM_DURATION=60)
+class LiveCountsTestCase(TestCase):
+    def setUp(self):
+        answer_key_cache.clear()
+        live_counts_cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(username="author", password="password123")
+        self.quiz = Quiz.objects.create(
+            creator=self.creator,
+            title="Live Quiz",
+            start_time=timezone.now() - timezone.timedelta(minutes=1),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        question = Question.objects.create(quiz=self.quiz, text="Live?")
+        self.right = Choice.objects.create(question=question, text="Yes", is_correct=True)
+        self.wrong = Choice.objects.create(question=question, text="No", is_correct=False)
+        self.url = reverse('quiz-live', kwargs={'quiz_id': self.quiz.pk})
+
+    def submit(self, username, choice):
+        self.client.force_authenticate(
+            user=User.objects.create_user(username=username, password="password123")
+        )
+        response = self.client.post(
+            reverse('quiz-attempt-create'),
+            {"quiz": self.quiz.id,
+             "answers": [{"question": choice.question_id, "selected_choice": choice.id}]},
+            format='json'
+        )
+        return response.data['quiz_attempt_id']
+
+    def test_counters_follow_submissions_updates_and_deletes(self):
+        for number in range(3):
+            attempt_id = self.submit(f"candidate{number}", self.right)
+        self.assertEqual(get_choice_counts(self.quiz.pk), {self.right.pk: 3})
+        self.assertEqual(ChoiceTally.objects.filter(choice=self.right).count(), 2)
+
+        url = reverse('quiz-attempt-crud', kwargs={'attempt_id': attempt_id})
+        self.client.put(url, {"answers": [{"question": self.wrong.question_id,
+                                           "selected_choice": self.wrong.id}]}, format='json')
+        self.assertEqual(get_choice_counts(self.quiz.pk), {self.right.pk: 2, self.wrong.pk: 1})
+
+        self.client.delete(url)
+        self.assertEqual(get_choice_counts(self.quiz.pk), {self.right.pk: 2, self.wrong.pk: 0})
+
+    def test_counters_follow_admin_and_cascade_deletes(self):
+        attempt_ids = [self.submit(f"candidate{number}", self.right) for number in range(3)]
+        admin = User.objects.create_superuser(username="admin", password="password123")
+        self.client.force_login(admin)
+
+        response = self.client.post(reverse('admin:quiz_app_quizattempt_changelist'), {
+            'action': 'delete_selected',
+            '_selected_action': attempt_ids[:1],
+            'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(get_choice_counts(self.quiz.pk), {self.right.pk: 2})
+
+        answer = AttemptedAnswers.objects.get(attempt_id=attempt_ids[1])
+        self.client.post(reverse('admin:quiz_app_attemptedanswers_delete', args=[answer.pk]),
+                         {'post': 'yes'})
+        self.assertEqual(get_choice_counts(self.quiz.pk), {self.right.pk: 1})
+
+        QuizAttempt.objects.get(id=attempt_ids[2]).user.delete()
+        self.assertEqual(get_choice_counts(self.quiz.pk), {self.right.pk: 0})
+
+    def test_stream_sends_snapshot_then_deltas(self):
+        self.submit("first", self.right)
+        self.client.force_authenticate(user=self.creator)
+        response = self.client.get(self.url, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        events = iter(response.streaming_content)
+        self.assertTrue(next(events).startswith(b'retry:'))
+        self.assertEqual(next(events),
+                         f'event: snapshot\ndata: {{"{self.right.pk}": 1}}\n\n'.encode())
+
+        self.submit("second", self.wrong)
+        self.assertEqual(next(events),
+                         f'event: delta\ndata: {{"{self.wrong.pk}": 1}}\n\n'.encode())
+        self.assertTrue(next(events).startswith(b':'))
+
+    async def test_stream_is_asynchronous_under_asgi(self):
+        await sync_to_async(self.submit)("first", self.right)
+        response = await AsyncClient().get(
+            self.url, HTTP_ACCEPT='text/event-stream',
+            headers={'Authorization': f'Bearer {AccessToken.for_user(self.creator)}'}
+        )
+        self.assertTrue(response.is_async)
+
+        events = aiter(response.streaming_content)
+        self.assertTrue((await anext(events)).startswith(b'retry:'))
+        self.assertEqual(await anext(events),
+                         f'event: snapshot\ndata: {{"{self.right.pk}": 1}}\n\n'.encode())
+        self.assertTrue((await anext(events)).startswith(b':'))
+
+    @override_settings(QUIZ_LIVE_STREAM_DURATION=0.05)
+    def test_stream_ends_and_releases_connections_between_ticks(self):
+        with mock.patch('quiz_app.tallies.close_idle_connections') as close:
+            events = list(tallies.stream_live_counts(self.quiz.pk))
+
+        self.assertTrue(events[0].startswith('retry:'))
+        self.assertTrue(events[1].startswith('event: snapshot'))
+        self.assertGreater(len(events), 2)
+        self.assertEqual(close.call_count, len(events) - 2)
+
+    @override_settings(QUIZ_LIVE_TICK=3600)
+    def test_viewers_share_one_read_per_tick(self):
+        streams = [tallies.stream_live_counts(self.quiz.pk) for _ in range(5)]
+
+        with CaptureQueriesContext(connection) as queries:
+            for stream in streams:
+                next(stream)
+                next(stream)
+        self.assertEqual(len(queries), 1)
+
+    def test_only_creator_can_follow(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="viewer", password="password123")
+        )
+        response = self.client.get(self.url, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ActiveQuizRegistryTestCase(TestCase):
+    def setUp(self):
+        quiz_registry.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="student", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now()
+
+    def create_quiz(self, title, starts_in, ends_in):
+        return Quiz.objects.create(
+            creator=self.user,
+            title=title,
+            start_time=self.now + timezone.timedelta(minutes=starts_in),
+            end_time=self.now + timezone.timedelta(minutes=ends_in)
+        )
+
+    def at(self, minutes):
+        return mock.patch('quiz_app.registry.now',
+                          return_value=self.now + timezone.timedelta(minutes=minutes))
+
+    def test_transitions_follow_start_and_end_times(self):
+        running = self.create_quiz("Running", -5, 10)
+        upcoming = self.create_quiz("Upcoming", 0.5, 20)
+        quiz_registry.refresh()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(quiz_registry.admission(running.pk), registry.OPEN)
+            self.assertEqual(quiz_registry.admission(upcoming.pk), registry.CLOSED)
+        self.assertEqual(len(queries), 0)
+
+        with self.at(15):
+            self.assertEqual(quiz_registry.admission(running.pk), registry.CLOSED)
+            self.assertEqual(quiz_registry.admission(upcoming.pk), registry.OPEN)
+            self.assertEqual([window.id for window in quiz_registry.active()], [upcoming.pk])
+
+        running.refresh_from_db()
+        self.assertFalse(running.is_active)
+        self.assertEqual(running.version, 2)
+
+    def test_unknown_quizzes_are_looked_up_once(self):
+        quiz_registry.refresh()
+        ended = self.create_quiz("Ended", -20, -10)
+        Quiz.objects.filter(pk=ended.pk).update(is_active=False)
+        quiz_registry.forget(ended.pk)
+
+        self.assertEqual(quiz_registry.admission(ended.pk), registry.CLOSED)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(quiz_registry.admission(ended.pk), registry.CLOSED)
+        self.assertEqual(len(queries), 0)
+
+        self.assertEqual(quiz_registry.admission(ended.pk + 100), registry.MISSING)
+
+    def test_active_listing_and_submission_admission(self):
+        running = self.create_quiz("Running", -5, 10)
+        ended = self.create_quiz("Ended", -20, -10)
+
+        response = self.client.get(reverse('quiz-active-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([quiz['title'] for quiz in response.data], ["Running"])
+
+        url = reverse('quiz-attempt-create')
+        response = self.client.post(url, {"quiz": ended.pk, "answers": []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'], "The quiz is not active or has expired.")
+
+        response = self.client.post(url, {"quiz": running.pk + 100, "answers": []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_warm_up_loads_open_quizzes_and_answer_keys(self):
+        running = self.create_quiz("Running", -5, 10)
+        self.create_quiz("Ended", -20, -10)
+        question = Question.objects.create(quiz=running, text="2 + 2?")
+        correct = Choice.objects.create(question=question, text="4", is_correct=True)
+        Choice.objects.create(question=question, text="5")
+        running.refresh_from_db()
+        answer_key_cache.clear()
+
+        self.assertEqual(warm_up(), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(quiz_registry.admission(running.pk), registry.OPEN)
+            answer_key = get_answer_key(running)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(answer_key.grade(question.pk, correct.pk), (True, 10))
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(username="student", password="password123")
+        self.request = RequestFactory().get(
+            '/', headers={'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        )
+        self.authentication = CachedJWTAuthentication()
+
+    def test_user_is_loaded_once(self):
+        user, _ = self.authentication.authenticate(self.request)
+        self.assertEqual(user, self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            user, _ = self.authentication.authenticate(self.request)
+        self.assertEqual(user, self.user)
+        self.assertEqual(len(queries), 0)
+
+    def test_deactivation_invalidates_cached_user(self):
+        self.authentication.authenticate(self.request)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate(self.request)
+
+    def test_password_change_bumps_version_but_login_does_not(self):
+        self.authentication.authenticate(self.request)
+        version = get_auth_version(self.user.pk)
+
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(get_auth_version(self.user.pk), version)
+
+        self.user.set_password("new-password")
+        self.user.save()
+        self.assertNotEqual(get_auth_version(self.user.pk), version)
+
+    def test_lost_version_does_not_revive_cached_user(self):
+        self.authentication.authenticate(self.request)
+
+        self.user.is_active = False
+        self.user.save()
+        cache.delete(auth_version_key(self.user.pk))
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate(self.request)
+
+    def test_api_request_saves_user_query(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.request.headers['Authorization'])
+        url = reverse('quiz-active-list')
+        quiz_registry.refresh()
+
+        with CaptureQueriesContext(connection) as cold:
+            client.get(url)
+        with CaptureQueriesContext(connection) as warm:
+            response = client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(warm), len(cold) - 1)
+
+
+@override_settings(QUIZ_READ_REPLICA='replica', QUIZ_PRIMARY_PIN_SECONDS=60)
+class ReplicaRoutingTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cookies = {}
+        self.factory = RequestFactory()
+        self.user = User(pk=1, username="student")
+        self.other = User(pk=2, username="other")
+
+    def headers(self, user):
+        return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    def route(self, method, user=None, status_code=200):
+        seen = []
+
+        def view(request):
+            seen.append(Quiz.objects.all().db)
+            with mock.patch.object(connections['default'], 'in_atomic_block', True):
+                seen.append(Quiz.objects.all().db)
+            return HttpResponse(status=status_code)
+
+        request = self.factory.generic(method, '/', headers=self.headers(user) if user else None)
+        request.COOKIES.update(self.cookies)
+        response = ReplicaRoutingMiddleware(view)(request)
+        self.cookies.update((name, morsel.value) for name, morsel in response.cookies.items())
+        return seen
+
+    def test_safe_requests_read_from_replica_outside_transactions(self):
+        self.assertEqual(self.route('GET', self.user), ['replica', 'default'])
+        self.assertEqual(self.route('GET'), ['replica', 'default'])
+        self.assertEqual(self.route('POST', self.user, 400), ['default', 'default'])
+        self.assertEqual(Quiz.objects.all().db, 'default')
+
+    def test_writers_are_pinned_to_primary(self):
+        self.route('POST', self.user, 400)
+        self.assertEqual(self.route('GET', self.user), ['replica', 'default'])
+
+        self.route('POST', self.user, 201)
+        self.assertEqual(self.route('GET', self.user), ['default', 'default'])
+        self.assertEqual(self.route('GET', self.other), ['replica', 'default'])
+
+    def test_pin_expires(self):
+        self.route('POST', self.user, 201)
+
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertEqual(self.route('GET', self.user), ['replica', 'default'])
+
+    def test_pin_cannot_be_forged(self):
+        self.cookies[PRIMARY_PIN_COOKIE] = str(self.user.pk)
+        self.assertEqual(self.route('GET', self.user), ['replica', 'default'])
+
+    def test_streaming_responses_keep_routing(self):
+        def view(request):
+            return StreamingHttpResponse(Quiz.objects.all().db for _ in range(2))
+
+        request = self.factory.get('/', headers=self.headers(self.user))
+        response = ReplicaRoutingMiddleware(view)(request)
+        self.assertEqual(b''.join(response.streaming_content), b'replicareplica')
+
+    @override_settings(QUIZ_READ_REPLICA=None)
+    def test_without_replica_everything_uses_primary(self):
+        self.assertEqual(self.route('GET', self.user), ['default', 'default'])
+
+    def test_replica_is_never_migrated(self):
+        router = ReplicaRouter()
+        self.assertTrue(router.allow_migrate('default', 'quiz_app'))
+        self.assertFalse(router.allow_migrate('replica', 'quiz_app'))
+
+
+@override_settings(QUIZ_READ_REPLICA='replica', QUIZ_PRIMARY_PIN_SECONDS=60)
+class ReplicaReadYourWritesTestCase(TransactionTestCase):
+    """Runs requests against a ``replica`` alias that mirrors ``default``."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Added once the test database exists, as a second connection to
+        # it, since the test runner only sets up configured aliases.
+        connections.settings['replica'] = {
+            **connections['default'].settings_dict,
+            'TEST': {'MIRROR': 'default'},
+        }
+        cls.databases = {'default', 'replica'}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+
+    def setUp(self):
+        cache.clear()
+        answer_key_cache.clear()
+        quiz_registry.clear()
+        self.user = User.objects.create_user(username="author", password="password123")
+        self.other = User.objects.create_user(username="other", password="password123")
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def read_attempts(self, client, quiz_id):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = client.get(reverse('quiz-attempt-list', args=[quiz_id]))
+        alias = 'replica' if len(replica) else 'default' if len(primary) else None
+        return alias, response.status_code
+
+    def test_writer_reads_back_from_primary(self):
+        quiz = Quiz.objects.create(
+            title="Mirrored", creator=self.user, start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        question = Question.objects.create(quiz=quiz, text="Question?")
+        choice = Choice.objects.create(question=question, text="Right", is_correct=True)
+        writer, reader = self.client_for(self.user), self.client_for(self.other)
+
+        self.assertEqual(self.read_attempts(writer, quiz.id), ('replica', 404))
+
+        response = writer.post(reverse('quiz-attempt-create'), {
+            'quiz': quiz.id,
+            'answers': [{'question': question.id, 'selected_choice': choice.id}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        self.assertEqual(self.read_attempts(writer, quiz.id), ('default', 200))
+        self.assertEqual(self.read_attempts(reader, quiz.id), ('replica', 200))
+
+        # A client that only sends its token, without the cookie.
+        self.assertEqual(self.read_attempts(self.client_for(self.user), quiz.id),
+                         ('default', 200))
+
+
+class ServeCommandTestCase(SimpleTestCase):
+    def get_server(self, **options):
+        options = {'bind': '127.0.0.1:9000', 'workers': 3, 'threads': 4,
+                   'pid': None, 'asgi': False, **options}
+        return QuizServer(*ServeCommand.get_application(options))
+
+    def test_wsgi_workers_are_preloaded_and_threaded(self):
+        server = self.get_server()
+
+        self.assertEqual(server.application_path, 'Quiz.wsgi.application')
+        self.assertEqual(server.cfg.workers, 3)
+        self.assertEqual(server.cfg.threads, 4)
+        self.assertEqual(server.cfg.worker_class_str, 'gthread')
+        self.assertTrue(server.cfg.preload_app)
+
+    def test_asgi_uses_uvicorn_workers(self):
+        server = self.get_server(asgi=True, threads=1)
+
+        self.assertEqual(server.application_path, 'Quiz.asgi.application')
+        self.assertEqual(server.cfg.worker_class_str, 'uvicorn_worker.UvicornWorker')
+
+    def test_several_workers_need_a_shared_cache(self):
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                              'LOCATION': 'redis://localhost:6379/0'}}
+
+        with override_settings(CACHES=local):
+            ServeCommand.check_shared_cache(1)
+            with self.assertRaisesMessage(CommandError, "QUIZ_CACHE_URL"):
+                ServeCommand.check_shared_cache(3)
+
+        with override_settings(CACHES=shared):
+            ServeCommand.check_shared_cache(3)
+
+    def test_workers_open_pools_without_checking_out_connections(self):
+        pooled, unpooled = mock.Mock(), mock.Mock(pool=None)
+        aliases = {'default': pooled, 'replica': unpooled}
+
+        with mock.patch('quiz_app.warmup.connections', mock.MagicMock(
+            __iter__=lambda _: iter(aliases), __getitem__=lambda _, alias: aliases[alias]
+        )):
+            post_fork(None, None)
+
+        pooled.pool.open.assert_called_once_with()
+        pooled.ensure_connection.assert_not_called()
+        unpooled.ensure_connection.assert_not_called()
+
+
+class StartupProfileTestCase(SimpleTestCase):
+    def test_startup_report_and_budget(self):
+        output = io.StringIO()
+        call_command('profile_startup', repeat=1, top=1000, budget=60000, stdout=output)
+
+        packages = output.getvalue().split("Slowest project modules")[0]
+        self.assertIn(" django ", packages)
+        self.assertNotIn(" graphene ", packages)
+        self.assertNotIn(" numpy ", packages)
+        self.assertIn("Cold start: median", output.getvalue())
+
+        with self.assertRaisesMessage(CommandError, "exceeds the budget of 1ms"):
+            call_command('profile_startup', repeat=1, budget=1, stdout=io.StringIO())
+
+
+class BenchBudgetTestCase(SimpleTestCase):
+    def result(self, name, timings, queries):
+        return (name, 'GET', sorted(timings), queries, 0)
+
+    @override_settings(QUIZ_BENCH_BUDGETS={'quiz-detail': {'p95_ms': 10, 'queries': 2}})
+    def test_budgets_fail_on_regression_only(self):
+        command = BenchCommand()
+        within = self.result('quiz-detail', [0.001] * 20, 2)
+        slow = self.result('quiz-detail', [0.001] * 18 + [0.05] * 2, 3)
+        unbudgeted = self.result('graphql', [1.0], 100)
+
+        self.assertEqual(command.check_budgets([within, unbudgeted]), [])
+        self.assertEqual(command.check_budgets([slow]), [
+            "quiz-detail: p95 50.00ms > 10ms",
+            "quiz-detail: 3 queries > 2",
+        ])
+
+
+class ReplayCommandTestCase(LiveServerTestCase):
+    def setUp(self):
+        quiz_registry.clear()
+        creator = User.objects.create_user(username="author", password="password123")
+        self.quiz = Quiz.objects.create(
+            creator=creator,
+            title="Exam",
+            start_time=timezone.now() - timezone.timedelta(minutes=5),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        for number in range(3):
+            question = Question.objects.create(quiz=self.quiz, text=f"Question {number}?")
+            Choice.objects.create(question=question, text="Right", is_correct=True)
+            Choice.objects.create(question=question, text="Wrong")
+
+    def test_scripted_exam_window(self):
+        with open(os.path.join(settings.BASE_DIR, 'scenarios', 'exam_window.json')) as bundled:
+            scenario = json.load(bundled)
+        scenario['variables']['quiz'] = self.quiz.pk
+        scenario['steps'][-1].update(repeat=2, think=0)
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as scenario_file:
+            json.dump(scenario, scenario_file)
+        self.addCleanup(os.remove, scenario_file.name)
+
+        output = io.StringIO()
+        call_command('replay', scenario_file.name, base_url=self.live_server_url,
+                     users=3, ramp=1, create_users=True, stdout=output)
+
+        self.assertIn("15 requests", output.getvalue())
+        self.assertIn("0 errors, 0 virtual users aborted", output.getvalue())
+        self.assertEqual(QuizAttempt.objects.filter(quiz=self.quiz).count(), 3)
+        self.assertEqual(LeaderboardEntry.objects.filter(quiz=self.quiz).count(), 3)
+
+
+class AdminScalingTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="password123")
+        self.client.force_login(self.admin)
+        self.quiz = Quiz.objects.create(
+            creator=self.admin,
+            title="Admin Quiz",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        self.other_quiz = Quiz.objects.create(
+            creator=self.admin,
+            title="Other Quiz",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1)
+        )
+        self.questions = []
+        for number in range(3):
+            question = Question.objects.create(quiz=self.quiz, text=f"Question {number}?")
+            self.questions.append(
+                (question, Choice.objects.create(question=question, text="Right", is_correct=True))
+            )
+
+    def add_attempts(self, quiz, count):
+        for number in range(count):
+            user = User.objects.create(username=f"{quiz.pk}-student{QuizAttempt.objects.count()}")
+            attempt = QuizAttempt.objects.create(user=user, quiz=quiz)
+            AttemptedAnswers.objects.bulk_create([
+                AttemptedAnswers(attempt=attempt, question=question, selected_choice=choice,
+                                 is_correct=True, points_awarded=1)
+                for question, choice in self.questions
+            ])
+        return attempt
+
+    def changelist_queries(self, name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        names = [
+            'admin:quiz_app_quiz_changelist',
+            'admin:quiz_app_question_changelist',
+            'admin:quiz_app_choice_changelist',
+            'admin:quiz_app_quizattempt_changelist',
+            'admin:quiz_app_attemptedanswers_changelist',
+        ]
+        self.add_attempts(self.quiz, 1)
+        few = [self.changelist_queries(name) for name in names]
+        self.add_attempts(self.quiz, 5)
+        self.add_attempts(self.other_quiz, 5)
+
+        self.assertEqual([self.changelist_queries(name) for name in names], few)
+
+    def test_autocomplete_filter(self):
+        self.add_attempts(self.quiz, 2)
+        self.add_attempts(self.other_quiz, 3)
+        url = reverse('admin:quiz_app_quizattempt_changelist')
+
+        response = self.client.get(url, {'quiz__id__exact': self.quiz.pk, 'q': 'student'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(response, '<input type="hidden" name="q" value="student">', html=True)
+        self.assertNotContains(response, 'Other Quiz</a>')
+
+        response = self.client.get(url, {'quiz__id__exact': 'abc'})
+        self.assertRedirects(response, f"{url}?e=1", fetch_redirect_response=False)
+
+    @override_settings(QUIZ_ADMIN_INLINE_MAX_ROWS=2)
+    def test_answers_inline_is_capped_and_read_only(self):
+        attempt = self.add_attempts(self.quiz, 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('admin:quiz_app_quizattempt_change', args=[attempt.pk])
+            )
+
+        self.assertEqual(response.status_code, 200)
+        formset = response.context['inline_admin_formsets'][0].formset
+        self.assertEqual(len(formset.forms), 2)
+        self.assertFalse(formset.can_delete)
+        self.assertLess(len(queries), 15)
+
+    @override_settings(QUIZ_ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_paginator_uses_estimate_for_large_tables(self):
+        self.add_attempts(self.quiz, 3)
+        queryset = QuizAttempt.objects.order_by('id')
+
+        with mock.patch('quiz_app.admin.estimate_count', return_value=5000000):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 5000000)
+
+        with mock.patch('quiz_app.admin.estimate_count', return_value=4):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 3)
+
+        with mock.patch('quiz_app.admin.estimate_count', return_value=None):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 3)
+
+
+class IdempotencyTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.executions = 0
+        self.started = threading.Event()
+
+    def request(self, key, data):
+        return SimpleNamespace(
+            headers={'Idempotency-Key': key}, user=SimpleNamespace(pk=1),
+            data=data, method='POST', path='/api/quiz/attempt/'
+        )
+
+    @idempotent
+    def submit(self, request):
+        self.executions += 1
+        self.started.set()
+        time.sleep(0.2)
+        return Response({"quiz_attempt_id": self.executions}, status=status.HTTP_201_CREATED)
+
+    def test_concurrent_duplicates_share_one_execution(self):
+        responses = []
+        first = threading.Thread(
+            target=lambda: responses.append(self.submit(self.request('key', {"quiz": 1})))
+        )
+        first.start()
+        self.started.wait(5)
+
+        duplicate = self.submit(self.request('key', {"quiz": 1}))
+        other = self.submit(self.request('key', {"quiz": 2}))
+        first.join()
+
+        self.assertEqual(self.executions, 1)
+        self.assertEqual(duplicate.data, responses[0].data)
+        self.assertEqual(duplicate['Idempotent-Replayed'], 'true')
+        self.assertEqual(other.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    @override_settings(QUIZ_IDEMPOTENCY_WAIT=0)
+    def test_duplicate_gives_up_while_first_is_running(self):
+        first = threading.Thread(target=self.submit, args=(self.request('key', {}),))
+        first.start()
+        self.started.wait(5)
+
+        response = self.submit(self.request('key', {}))
+        first.join()
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.executions, 1)
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+            **{scope.replace('_', '-'): rate for scope, rate in rates.items()},
+        },
+    })
+
+
+class WriteThrottlingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        quiz_registry.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="student", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.quizzes = []
+        for number in range(3):
+            quiz = Quiz.objects.create(
+                creator=self.user,
+                title=f"Throttled Quiz {number}",
+                start_time=timezone.now() - timezone.timedelta(minutes=1),
+                end_time=timezone.now() + timezone.timedelta(hours=1)
+            )
+            question = Question.objects.create(quiz=quiz, text="Question?")
+            choice = Choice.objects.create(question=question, text="Right", is_correct=True)
+            self.quizzes.append((quiz, [{"question": question.id, "selected_choice": choice.id}]))
+
+    def submit(self, number):
+        quiz, answers = self.quizzes[number]
+        return self.client.post(reverse('quiz-attempt-create'),
+                                {"quiz": quiz.id, "answers": answers}, format='json')
+
+    @throttle_rates(attempt_user='2/min')
+    def test_user_window_slides(self):
+        now = 1000.0
+        with mock.patch.object(SlidingWindowThrottle, 'timer', side_effect=lambda: now):
+            self.assertEqual(self.submit(0).status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self.submit(1).status_code, status.HTTP_201_CREATED)
+
+            response = self.submit(2)
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response['Retry-After'], '50')
+
+            attempt = QuizAttempt.objects.first()
+            url = reverse('quiz-attempt-crud', kwargs={'attempt_id': attempt.id})
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+            now += 49
+            self.assertEqual(self.submit(2).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            now += 1
+            self.assertEqual(self.submit(2).status_code, status.HTTP_201_CREATED)
+
+    @throttle_rates(attempt_quiz='1/min')
+    def test_quiz_window_is_shared_by_users(self):
+        self.assertEqual(self.submit(0).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.submit(1).status_code, status.HTTP_201_CREATED)
+
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="second", password="password123")
+        )
+        self.assertEqual(self.submit(0).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        attempt = QuizAttempt.objects.get(user=self.user, quiz=self.quizzes[1][0])
+        self.client.force_authenticate(user=self.user)
+        response = self.client.put(
+            reverse('quiz-attempt-crud', kwargs={'attempt_id': attempt.id}),
+            {"answers": self.quizzes[1][1]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(QUIZ_GRADING_MAX_CONCURRENCY=1, QUIZ_GRADING_QUEUE_TIMEOUT=0.1)
+    def test_grading_is_shed_at_the_concurrency_limit(self):
+        slot = grading_limiter.acquire(1, 0)
+        self.assertIsNotNone(slot)
+        try:
+            response = self.submit(0)
+        finally:
+            grading_limiter.release(slot)
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.submit(0).status_code, status.HTTP_201_CREATED)
+
+    def test_concurrency_is_counted_across_processes(self):
+        now = 1005.0
+        limiter, other_process = (ConcurrencyLimiter('test', 10) for _ in range(2))
+
+        with mock.patch('time.time', side_effect=lambda: now):
+            leaked = limiter.try_acquire(2)
+            slot = other_process.try_acquire(2)
+            self.assertIsNone(limiter.try_acquire(2))
+
+            now += 10
+            self.assertIsNone(limiter.try_acquire(2))
+            other_process.release(slot)
+            self.assertIsNotNone(limiter.try_acquire(2))
+
+            now += 20
+            self.assertIsNotNone(leaked)
+            self.assertIsNotNone(limiter.try_acquire(2))
+            self.assertIsNotNone(other_process.try_acquire(2))
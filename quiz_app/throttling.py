@@ -0,0 +1,215 @@
+import functools
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from quiz_app.caching import LRUCache
+from quiz_app.models import QuizAttempt
+
+
+attempt_quiz_cache = LRUCache(getattr(settings, 'QUIZ_THROTTLE_ATTEMPT_CACHE_SIZE', 4096))
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Throttle for writes with a counter per key and period in the Django
+    cache, updated with atomic ``add``/``incr`` so that every process sharing
+    the cache enforces the same limit.
+
+    A rate of ``N/period`` from DEFAULT_THROTTLE_RATES allows N requests in
+    any period, estimated from the counts of the current and the previous
+    period, the latter weighted by how much of it the sliding window still
+    covers. Rejected requests are not counted. Safe methods are not
+    throttled.
+    """
+
+    def get_rate(self):
+        # Read the rates when the throttle is created rather than when the
+        # module is imported, so that overridden settings apply.
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS or self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        period, self.elapsed = divmod(self.now, self.duration)
+        current_key = f"{self.key}:{int(period)}"
+
+        self.cache.add(current_key, 0, timeout=2 * self.duration)
+        self.count = self.cache.incr(current_key)
+        self.previous = self.cache.get(f"{self.key}:{int(period) - 1}", 0)
+        self.weight = 1 - self.elapsed / self.duration
+
+        if self.previous * self.weight + self.count <= self.num_requests:
+            return True
+
+        self.cache.decr(current_key)
+        return False
+
+    def wait(self):
+        counted = self.count - 1
+
+        if self.previous and counted < self.num_requests:
+            # Later in this period, once enough of the previous one slid out.
+            free = self.num_requests - counted - 1
+            return max(0, self.weight - free / self.previous) * self.duration
+
+        # In the next period, once enough of this one slid out.
+        wait = self.duration - self.elapsed
+        if counted:
+            wait += max(0, 1 - (self.num_requests - 1) / counted) * self.duration
+        return wait
+
+
+class AttemptUserThrottle(SlidingWindowThrottle):
+    """Limits the attempt writes of each user (or client IP)."""
+
+    scope = 'attempt-user'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class AttemptQuizThrottle(SlidingWindowThrottle):
+    """
+    Limits the submissions and updates of attempts of each quiz, which are
+    graded; deleting an attempt is not limited per quiz.
+    """
+
+    scope = 'attempt-quiz'
+
+    def get_cache_key(self, request, view):
+        if request.method == 'POST':
+            quiz_id = request.data.get('quiz')
+        elif request.method in ('PUT', 'PATCH'):
+            quiz_id = get_attempt_quiz_id(view.kwargs.get('attempt_id'))
+        else:
+            return None
+
+        try:
+            ident = int(quiz_id)
+        except (TypeError, ValueError):
+            return None
+
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+def get_attempt_quiz_id(attempt_id):
+    """Return the quiz of an attempt, which never changes, cached per process."""
+    quiz_id = attempt_quiz_cache.get(attempt_id)
+
+    if quiz_id is None and attempt_id is not None:
+        quiz_id = (
+            QuizAttempt.objects.filter(id=attempt_id)
+            .values_list('quiz_id', flat=True)
+            .first()
+        )
+        if quiz_id is not None:
+            attempt_quiz_cache.set(attempt_id, quiz_id)
+
+    return quiz_id
+
+
+class ConcurrencyLimiter:
+    """
+    Counts the requests in progress in every process sharing the Django
+    cache against a limit.
+
+    Each request is counted under the slot of ``slot_seconds`` in which it
+    started, and the current and previous slots are summed. A slot's key
+    expires two slots later, so a count leaked by a killed worker is
+    forgotten after at most twice ``slot_seconds``, which should therefore
+    exceed the longest request.
+    """
+
+    def __init__(self, name, slot_seconds):
+        self.name = name
+        self.slot_seconds = slot_seconds
+
+    def slot_key(self, slot):
+        return f"concurrency:{self.name}:{slot}"
+
+    def try_acquire(self, limit):
+        slot = int(time.time() // self.slot_seconds)
+        key = self.slot_key(slot)
+
+        cache.add(key, 0, timeout=2 * self.slot_seconds)
+        if cache.incr(key) + cache.get(self.slot_key(slot - 1), 0) <= limit:
+            return slot
+
+        self.release(slot)
+        return None
+
+    def acquire(self, limit, timeout, poll_interval=0.05):
+        """
+        Return the slot a request was counted under, waiting up to
+        ``timeout`` seconds for the count to drop below ``limit``, or None.
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            slot = self.try_acquire(limit)
+            if slot is not None or time.monotonic() >= deadline:
+                return slot
+
+            time.sleep(min(poll_interval, max(0, deadline - time.monotonic())))
+
+    def release(self, slot):
+        try:
+            cache.decr(self.slot_key(slot))
+        except ValueError:
+            # The slot has expired and its counts with it.
+            pass
+
+
+grading_limiter = ConcurrencyLimiter('grading', settings.QUIZ_SERVE_TIMEOUT)
+
+
+def limit_grading_concurrency(view_method):
+    """
+    Admit at most QUIZ_GRADING_MAX_CONCURRENCY requests of the decorated
+    APIView methods at a time across all processes sharing the cache.
+
+    A request waits up to QUIZ_GRADING_QUEUE_TIMEOUT seconds for a slot and
+    is then shed with 503 and Retry-After, so a burst of grading cannot
+    take every worker thread from the read endpoints.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        limit = settings.QUIZ_GRADING_MAX_CONCURRENCY
+
+        if limit is None:
+            return view_method(self, request, *args, **kwargs)
+
+        slot = grading_limiter.acquire(limit, settings.QUIZ_GRADING_QUEUE_TIMEOUT,
+                                       settings.QUIZ_GRADING_QUEUE_POLL_INTERVAL)
+        if slot is None:
+            return Response(
+                {"detail": "The server is busy grading other attempts. Please retry."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(settings.QUIZ_GRADING_RETRY_AFTER)}
+            )
+
+        try:
+            return view_method(self, request, *args, **kwargs)
+        finally:
+            grading_limiter.release(slot)
+
+    return wrapper
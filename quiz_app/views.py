@@ -1,31 +1,65 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.utils.timezone import now
+from django.urls import reverse
 from rest_framework import status
-from rest_framework.generics import RetrieveAPIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
-from quiz_app.models import Quiz, QuizAttempt
+from quiz_app import exports, leaderboard, registry, tallies
+from quiz_app.analytics import get_quiz_analytics
+from quiz_app.idempotency import idempotent
+from quiz_app.models import Quiz, QuizAttempt, LeaderboardEntry
+from quiz_app.pagination import KeysetPagination
+from quiz_app.registry import quiz_registry
+from quiz_app.payloads import get_quiz_detail, quiz_detail_response
+from quiz_app.throttling import (
+    AttemptQuizThrottle,
+    AttemptUserThrottle,
+    limit_grading_concurrency,
+)
+from quiz_app.renderers import NDJSONRenderer, CSVRenderer, EventStreamRenderer
 from quiz_app.serializers import (
-    QuizDetailSerializer,
     QuizAttemptSerializer,
     QuizCreateSerializer,
     QuizAttemptCreateSerializer,
 )
 
 
-class QuizDetailView(RetrieveAPIView):
-    queryset = Quiz.objects.prefetch_related('questions')
-    serializer_class = QuizDetailSerializer
+class QuizDetailView(APIView):
+    def get(self, request, pk):
+        payload = get_quiz_detail(pk)
+
+        if payload is None:
+            return Response(
+                {"detail": "Quiz not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return quiz_detail_response(request, payload)
 
 
 class QuizAttemptListView(APIView):
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        NDJSONRenderer,
+        CSVRenderer,
+    ]
+    streams = {
+        NDJSONRenderer.format: exports.stream_ndjson,
+        CSVRenderer.format: exports.stream_csv,
+    }
+
     def get(self, request, quiz_id):
         quiz_attempts = (
             QuizAttempt.objects.filter(quiz__id=quiz_id)
-            .select_related('quiz')
+            .select_related('quiz', 'user')
             .prefetch_related(
                 'answers__question',
                 'answers__selected_choice'
@@ -38,12 +72,26 @@ class QuizAttemptListView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        renderer = request.accepted_renderer
+
+        if renderer.format in self.streams:
+            response = StreamingHttpResponse(
+                self.streams[renderer.format](quiz_id),
+                content_type=f"{renderer.media_type}; charset={renderer.charset}"
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="quiz-{quiz_id}-attempts.{renderer.format}"'
+            )
+            return response
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(quiz_attempts, request, view=self)
         serializer = QuizAttemptSerializer(
-            quiz_attempts,
+            page,
             many=True
         )
 
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
 
 class QuizCreateView(APIView):
@@ -73,7 +121,10 @@ class QuizCreateView(APIView):
 
 class QuizAttemptCRUDView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [AttemptUserThrottle, AttemptQuizThrottle]
 
+    @idempotent
+    @limit_grading_concurrency
     def post(self, request, *args, **kwargs):
         quiz_id = request.data.get("quiz")
 
@@ -84,36 +135,55 @@ class QuizAttemptCRUDView(APIView):
             )
 
         try:
-            quiz = Quiz.objects.get(id=quiz_id)
-
-            if not quiz.is_active or not (quiz.start_time <= now() <= quiz.end_time):
-                return Response(
-                    {"detail": "The quiz is not active or has expired."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            admission = quiz_registry.admission(int(quiz_id))
+        except (TypeError, ValueError):
+            admission = registry.MISSING
 
-        except Quiz.DoesNotExist:
+        if admission == registry.MISSING:
             return Response(
                 {"detail": "Quiz not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        if QuizAttempt.objects.filter(quiz=quiz, user=request.user).exists():
+        if admission == registry.CLOSED:
             return Response(
-                {"detail": "You have already attempted this quiz."},
+                {"detail": "The quiz is not active or has expired."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        if QuizAttempt.objects.filter(quiz_id=quiz_id, user=request.user).exists():
+            return already_attempted()
+
+        defer_grading = wants_async_grading(request)
         serializer = QuizAttemptCreateSerializer(
             data=request.data,
-            context={'request': request}
+            context={'request': request, 'defer_grading': defer_grading}
         )
 
         if serializer.is_valid():
-            quiz_attempt = serializer.save(
-                user=request.user,
-                quiz=quiz
-            )
+            try:
+                quiz_attempt = serializer.save(user=request.user)
+            except IntegrityError:
+                # A concurrent submission by the same user won the unique
+                # (user, quiz) constraint after the check above.
+                return already_attempted()
+
+            if defer_grading:
+                status_url = reverse('quiz-attempt-status',
+                                     kwargs={'attempt_id': quiz_attempt.id})
+                return Response(
+                    {
+                        "message": "Quiz attempt accepted for grading.",
+                        "quiz_attempt_id": quiz_attempt.id,
+                        "status_url": status_url
+                    },
+                    status=status.HTTP_202_ACCEPTED,
+                    headers={
+                        'Location': status_url,
+                        'Preference-Applied': 'respond-async',
+                    }
+                )
+
             return Response(
                 {
                     "message": "Quiz attempt created successfully!",
@@ -139,7 +209,7 @@ class QuizAttemptCRUDView(APIView):
         try:
             quiz_attempt = (
                 QuizAttempt.objects.select_related('quiz', 'user')
-                .prefetch_related('answers')
+                .prefetch_related('answers__question', 'answers__selected_choice')
                 .get(
                     id=attempt_id,
                     user=request.user
@@ -158,6 +228,7 @@ class QuizAttemptCRUDView(APIView):
             status=status.HTTP_200_OK
         )
 
+    @limit_grading_concurrency
     def put(self, request, *args, **kwargs):
         attempt_id = kwargs.get('attempt_id')
         
@@ -167,34 +238,44 @@ class QuizAttemptCRUDView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            quiz_attempt = QuizAttempt.objects.get(
-                id=attempt_id,
-                user=request.user
-            )
-        except QuizAttempt.DoesNotExist:
-            return Response(
-                {"detail": "Quiz attempt not found or not authorized to update."},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        # The row lock makes the update wait for a grader that has claimed
+        # the attempt, and keeps graders off it until the update commits.
+        with transaction.atomic():
+            try:
+                quiz_attempt = QuizAttempt.objects.select_for_update().get(
+                    id=attempt_id,
+                    user=request.user
+                )
+            except QuizAttempt.DoesNotExist:
+                return Response(
+                    {"detail": "Quiz attempt not found or not authorized to update."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
 
-        serializer = QuizAttemptCreateSerializer(
-            quiz_attempt,
-            data=request.data,
-            partial=True,
-            context={'request': request}
-        )
-        
-        if serializer.is_valid():
-            quiz_attempt = serializer.save()
-            return Response(
-                {
-                    "message": "Quiz attempt updated successfully!",
-                    "quiz_attempt_id": quiz_attempt.id
-                },
-                status=status.HTTP_200_OK
+            if quiz_attempt.status == QuizAttempt.Status.PENDING:
+                return Response(
+                    {"detail": "The quiz attempt is still being graded. Retry once it is graded."},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Retry-After': str(settings.QUIZ_GRADING_POLL_INTERVAL)}
+                )
+
+            serializer = QuizAttemptCreateSerializer(
+                quiz_attempt,
+                data=request.data,
+                partial=True,
+                context={'request': request}
             )
-        
+
+            if serializer.is_valid():
+                quiz_attempt = serializer.save()
+                return Response(
+                    {
+                        "message": "Quiz attempt updated successfully!",
+                        "quiz_attempt_id": quiz_attempt.id
+                    },
+                    status=status.HTTP_200_OK
+                )
+
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
@@ -220,38 +301,169 @@ class QuizAttemptCRUDView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        quiz_attempt.delete()
+        with transaction.atomic(), tallies.removing_tallies(quiz_attempt):
+            quiz_attempt.delete()
+
         return Response(
             {"message": "Quiz attempt deleted successfully!"},
             status=status.HTTP_204_NO_CONTENT
         )
 
 
+def already_attempted():
+    return Response(
+        {"detail": "You have already attempted this quiz."},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def wants_async_grading(request):
+    prefer = request.headers.get('Prefer', '')
+    preferences = {token.strip().lower() for token in prefer.split(',')}
+    return settings.QUIZ_ASYNC_GRADING or 'respond-async' in preferences
+
+
+class QuizAttemptStatusView(APIView):
+    def get(self, request, attempt_id):
+        quiz_attempt = get_object_or_404(
+            QuizAttempt.objects.only('id', 'user_id', 'status', 'score'),
+            id=attempt_id,
+            user=request.user
+        )
+        pending = quiz_attempt.status == QuizAttempt.Status.PENDING
+
+        return Response(
+            {
+                "quiz_attempt_id": quiz_attempt.id,
+                "status": quiz_attempt.status,
+                "score": None if pending else quiz_attempt.score,
+            },
+            status=status.HTTP_200_OK,
+            headers={'Retry-After': str(settings.QUIZ_GRADING_POLL_INTERVAL)} if pending else None
+        )
+
+
+def get_ranking(params):
+    ranking = params.get('ranking', leaderboard.COMPETITION)
+
+    if ranking not in leaderboard.RANKINGS:
+        raise ValidationError(
+            {"ranking": f"Must be one of: {', '.join(leaderboard.RANKINGS)}."}
+        )
+
+    return ranking
+
+
+def get_int_param(params, name, default, minimum=0, maximum=None):
+    value = params.get(name, default)
+
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: "A valid integer is required."})
+
+    if maximum is None and value < minimum:
+        raise ValidationError({name: f"Must be at least {minimum}."})
+
+    if maximum is not None and not minimum <= value <= maximum:
+        raise ValidationError({name: f"Must be between {minimum} and {maximum}."})
+
+    return value
+
+
 class LeaderboardView(APIView):
     def get(self, request, quiz_id):
         quiz = get_object_or_404(
-            Quiz,
+            Quiz.objects.only('id', 'title'),
             id=quiz_id
         )
-
-        attempts = (
-            QuizAttempt.objects.filter(quiz=quiz)
-            .order_by('-score')
+        ranking = get_ranking(request.query_params)
+        offset = get_int_param(request.query_params, 'offset', 0)
+        limit = get_int_param(
+            request.query_params, 'limit',
+            settings.QUIZ_LEADERBOARD_PAGE_SIZE,
+            minimum=1,
+            maximum=settings.QUIZ_LEADERBOARD_MAX_PAGE_SIZE
         )
 
-        leaderboard = [
-            {
-                "username": attempt.user.username,
-                "score": attempt.score,
-                "rank": rank + 1
-            }
-            for rank, attempt in enumerate(attempts)
-        ]
+        rows, has_more = leaderboard.top_entries(quiz.id, offset, limit, ranking)
 
         return Response(
             {
                 "quiz_title": quiz.title,
-                "leaderboard": leaderboard,
+                "leaderboard": rows,
+                "next_offset": offset + limit if has_more else None,
             },
             status=status.HTTP_200_OK
         )
+
+
+class LeaderboardRankView(APIView):
+    def get(self, request, quiz_id):
+        ranking = get_ranking(request.query_params)
+
+        try:
+            entry = LeaderboardEntry.objects.get(
+                quiz_id=quiz_id,
+                user=request.user
+            )
+        except LeaderboardEntry.DoesNotExist:
+            return Response(
+                {"detail": "You have not attempted this quiz."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(
+            {
+                "username": entry.username,
+                "score": entry.score,
+                "rank": leaderboard.rank_for_score(quiz_id, entry.score, ranking),
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class QuizAnalyticsView(APIView):
+    def get(self, request, quiz_id):
+        analytics = get_quiz_analytics(quiz_id)
+
+        if analytics is None:
+            return Response(
+                {"detail": "Quiz not found."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(analytics, status=status.HTTP_200_OK)
+
+
+class QuizLiveCountsView(APIView):
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer]
+
+    def get(self, request, quiz_id):
+        quiz = get_object_or_404(Quiz.objects.only('id', 'creator_id'), id=quiz_id)
+
+        if quiz.creator_id != request.user.id:
+            return Response(
+                {"detail": "Only the quiz creator can follow live responses."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        # Under ASGI the stream is asynchronous, so viewers don't hold a
+        # thread; under WSGI each one holds a thread for a short stream.
+        if isinstance(request._request, ASGIRequest):
+            events = tallies.astream_live_counts(quiz.id)
+        else:
+            events = tallies.stream_live_counts(quiz.id)
+
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class ActiveQuizListView(APIView):
+    def get(self, request):
+        return Response(
+            [window._asdict() for window in quiz_registry.active()],
+            status=status.HTTP_200_OK
+        )
@@ -0,0 +1,46 @@
+from django.db import connections
+
+from quiz_app.grading import preload_answer_keys
+from quiz_app.models import Quiz
+from quiz_app.registry import quiz_registry
+
+
+def open_pools():
+    """
+    Open the connection pool of every database that pools connections; the
+    pool connects up to its minimum size in the background. Other Django
+    connections belong to the thread that opens them, so they cannot be
+    opened ahead of time for the threads that serve requests.
+    """
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            pool.open()
+
+
+def release_connections():
+    """
+    Close every open connection and connection pool of this process, so
+    none of their sockets is inherited by a forked child.
+    """
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+
+
+def warm_up():
+    """
+    Prepare a worker before it accepts traffic: open the connection pools
+    where pooling is enabled, load the active quiz registry and the answer
+    keys of the open quizzes. Returns the number of answer keys loaded.
+
+    Run it in the process that serves requests, after any fork, so the
+    connections are not shared between workers.
+    """
+    open_pools()
+
+    open_quiz_ids = [window.id for window in quiz_registry.active()]
+    quizzes = Quiz.objects.filter(id__in=open_quiz_ids).only('id', 'version')
+
+    return preload_answer_keys(quizzes)